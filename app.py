@@ -1,30 +1,83 @@
 import streamlit as st
-import pandas as pd
+import os
+import threading
 from datetime import datetime, timedelta
-import io
-from pdf_generator import PurchaseOrderPDF
+from decimal import Decimal
+from auth import get_user_store
+from catalog import CatalogImportError, get_catalog, import_catalog
+from functools import partial
+from normalize import format_percent
+from pdf_generator import prewarm
+from po_numbers import get_default_allocator
+from po_store import get_default_store
+from render_jobs import get_render_queue
+from vendors import VendorImportError, get_vendor_directory, vendors_path
+
+# pandas (via order/line_items) and ReportLab are imported on first use, so
+# the login page and a fresh worker do not pay for them up front.
+
+# Form fields copied when an order from the history is duplicated
+FORM_FIELDS = ['company_name', 'company_address', 'company_phone',
+               'bill_to_name', 'bill_to_address', 'bill_to_phone',
+               'ship_to_name', 'ship_to_address', 'ship_to_phone',
+               'notes', 'terms']
+
+HISTORY_PAGE_SIZE = 20
+
+# Vendor suggestions shown under the Bill To company
+VENDOR_SUGGESTIONS = 8
+
+# Catalog matches offered for the item search
+CATALOG_SUGGESTIONS = 10
+
+# How often a running background render refreshes its progress
+RENDER_POLL_SECONDS = 0.5
+
+# Session state holding the login; logout clears only these. The session
+# token stays on the server and is never put in the page URL.
+AUTH_KEYS = ['authenticated', 'user_email', 'auth_token']
+
+# Set PO_PREWARM=1 to warm the PDF renderer in the background at server start
+PREWARM_ENV = 'PO_PREWARM'
+
+@st.cache_resource
+def start_prewarm():
+    """Warm the PDF renderer in a background thread, once per server process"""
+    thread = threading.Thread(target=prewarm, name="pdf-prewarm", daemon=True)
+    thread.start()
+    return thread
 
 def initialize_session_state():
     """Initialize session state variables"""
-    if 'items' not in st.session_state:
-        st.session_state['items'] = []
-    if 'po_counter' not in st.session_state:
-        st.session_state['po_counter'] = 1
     if 'authenticated' not in st.session_state:
         st.session_state['authenticated'] = False
     if 'user_email' not in st.session_state:
         st.session_state['user_email'] = ''
 
-# Sample credentials - In production, use proper authentication
-SAMPLE_USERS = {
-    "admin@kovanlabs.com": "admin123",
-    "manager@kovanlabs.com": "manager123",
-    "user@kovanlabs.com": "password123"
-}
+def check_session():
+    """Verify the session token on every rerun; only a signature and expiry check when cached"""
+    token = st.session_state.get('auth_token')
+    email = get_user_store().verify_session(token) if token else None
+    if email is None:
+        for key in AUTH_KEYS:
+            st.session_state.pop(key, None)
+        initialize_session_state()
+        return False
+    st.session_state['authenticated'] = True
+    st.session_state['user_email'] = email
+    st.session_state['auth_token'] = token
+    return True
 
-def authenticate_user(email, password):
-    """Authenticate user with sample credentials"""
-    return email in SAMPLE_USERS and SAMPLE_USERS[email] == password
+def logout():
+    """End the session and forget the login, keeping the rest of the session state"""
+    release_po_number('session ended')
+    token = st.session_state.get('auth_token')
+    if token:
+        get_user_store().end_session(token)
+    for key in AUTH_KEYS:
+        st.session_state.pop(key, None)
+    # The next login starts from a freshly reserved number
+    st.session_state.pop('po_number', None)
 
 def show_login_form():
     """Display login form"""
@@ -51,23 +104,17 @@ def show_login_form():
                     login_button = st.form_submit_button("🚀 Login", use_container_width=True, type="primary")
                 
                 if login_button:
-                    if authenticate_user(email, password):
+                    result = get_user_store().login(email, password)
+                    if result.token:
                         st.session_state['authenticated'] = True
-                        st.session_state['user_email'] = email
+                        st.session_state['user_email'] = result.email
+                        st.session_state['auth_token'] = result.token
                         st.success("✅ Login successful! Redirecting...")
                         st.rerun()
+                    elif result.retry_after:
+                        st.error(f"❌ Too many failed attempts. Try again in {result.retry_after:.0f} seconds.")
                     else:
                         st.error("❌ Invalid email or password. Please try again.")
-            
-            # Show sample credentials
-            with st.expander("📋 Sample Login Credentials"):
-                st.markdown("""
-                **For testing purposes, use any of these credentials:**
-                
-                🔹 **Admin**: admin@kovanlabs.com / admin123  
-                🔹 **Manager**: manager@kovanlabs.com / manager123  
-                🔹 **User**: user@kovanlabs.com / password123
-                """)
 
 def show_header():
     """Show header with user info and logout"""
@@ -78,50 +125,285 @@ def show_header():
     
     with col2:
         if st.button("🚪 Logout", type="secondary"):
-            # Clear session state
-            for key in list(st.session_state.keys()):
-                del st.session_state[key]
+            logout()
             st.rerun()
 
 def add_item():
     """Add new item to the list"""
     if st.session_state.item_name and st.session_state.item_qty > 0 and st.session_state.item_price > 0:
-        total = st.session_state.item_qty * st.session_state.item_price
-        st.session_state['items'].append({
-            'item': st.session_state.item_name,
-            'quantity': st.session_state.item_qty,
-            'unit_price': st.session_state.item_price,
-            'total': total
-        })
+        get_order().add_item(st.session_state.item_name,
+                             st.session_state.item_qty,
+                             st.session_state.item_price)
         st.success(f"✅ Added: {st.session_state.item_name} (Qty: {st.session_state.item_qty}, Price: Rs.{st.session_state.item_price:,.2f})")
         # Note: Clear fields manually after adding
 
-def remove_item(index):
-    """Remove item from the list"""
-    st.session_state['items'].pop(index)
+def next_po_number():
+    """PO number reserved for the next order in this session, allocated on first use"""
+    if 'reserved_po_number' not in st.session_state:
+        st.session_state['reserved_po_number'] = get_default_allocator().reserve()
+    return st.session_state['reserved_po_number']
+
+def release_po_number(reason):
+    """Record the session's reserved PO number as a gap if no order was generated with it"""
+    po_number = st.session_state.pop('reserved_po_number', None)
+    if po_number:
+        get_default_allocator().release(po_number, reason=reason)
+
+def refresh_po_number():
+    """Put the next reserved PO number in the PO Number field once a render has used the current one.
+
+    The field is a keyed widget, so it keeps its value across reruns; it
+    only changes when its session state is assigned before it is drawn.
+    """
+    job_id = st.session_state.get('render_job')
+    job = get_render_queue().get(job_id) if job_id else None
+    if job is not None and job.status == 'done' and job.po_data['po_number'] == st.session_state.get('reserved_po_number'):
+        del st.session_state['reserved_po_number']
+        st.session_state['po_number'] = next_po_number()
+    elif 'po_number' not in st.session_state:
+        st.session_state['po_number'] = next_po_number()
+
+def duplicate_po(po_number):
+    """Load a stored purchase order into the form under a new PO number"""
+    from order import PurchaseOrder
+
+    po_data = get_default_store().get(po_number)
+    if po_data is None:
+        return
+    for key in FORM_FIELDS:
+        st.session_state[key] = po_data.get(key) or ''
+    st.session_state['ship_to_same'] = False
+    st.session_state['po_number'] = next_po_number()
+    st.session_state['discount'] = float(po_data.get('discount') or 0)
+    st.session_state['tax_percent'] = float(Decimal(str(po_data.get('tax_rate') or 0)) * 100)
+    st.session_state['order'] = PurchaseOrder.from_po_data(po_data)
+
+def search_history(store, filters, cursor):
+    """One page of history search results, reused until the filters, page or store change"""
+    key = (filters, cursor, store.latest_id())
+    cached = st.session_state.get('history_page')
+    if cached is None or cached[0] != key:
+        query, dates = filters
+        date_from = dates[0] if len(dates) > 0 else None
+        date_to = dates[1] if len(dates) > 1 else None
+        cached = (key, store.search(query, date_from, date_to, limit=HISTORY_PAGE_SIZE, cursor=cursor))
+        st.session_state['history_page'] = cached
+    return cached[1]
+
+def show_history():
+    """Searchable, paginated history of generated purchase orders"""
+    store = get_default_store()
+    # Tracking whether the expander is open lets a collapsed history skip the search
+    history = st.expander("📚 Purchase Order History", key="history_open", on_change="rerun")
+    if not history.open:
+        return
+    with history:
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            query = st.text_input("Search by PO number or Bill To company", key="history_query")
+        with col2:
+            dates = st.date_input("Order date range", value=(), key="history_dates")
+        
+        # Start again from the first page whenever the filters change
+        filters = (query.strip(), tuple(dates))
+        if st.session_state.get('history_filters') != filters:
+            st.session_state['history_filters'] = filters
+            st.session_state['history_cursors'] = [None]
+        cursors = st.session_state['history_cursors']
+        
+        rows, next_cursor = search_history(store, filters, cursors[-1])
+        if not rows:
+            st.info("No purchase orders found.")
+            return
+        
+        st.dataframe(rows, hide_index=True, use_container_width=True,
+                     column_order=['po_number', 'order_date', 'due_date', 'bill_to_name',
+                                   'total', 'item_count', 'created_by', 'created_at'])
+        
+        col_prev, col_page, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            if len(cursors) > 1 and st.button("⬅️ Previous", key="history_prev"):
+                cursors.pop()
+                st.rerun()
+        with col_page:
+            st.caption(f"Page {len(cursors)}")
+        with col_next:
+            if next_cursor is not None and st.button("Next ➡️", key="history_next"):
+                cursors.append(next_cursor)
+                st.rerun()
+        
+        has_pdf = {row['po_number']: row['has_pdf'] for row in rows}
+        selected = st.selectbox("Purchase Order", list(has_pdf), key="history_selected")
+        col_a, col_b = st.columns(2)
+        with col_a:
+            st.button("📄 Duplicate this PO", on_click=duplicate_po, args=(selected,),
+                      use_container_width=True)
+        with col_b:
+            if has_pdf[selected]:
+                # The PDF is read from the store only when the button is clicked
+                st.download_button("Download PDF", data=partial(store.get_pdf, selected),
+                                   file_name=f"PO_{selected}.pdf", mime="application/pdf",
+                                   key="history_download", use_container_width=True)
+
+def fill_bill_to():
+    """Fill the Bill To fields from the vendor picked in the suggestions"""
+    vendor = get_vendor_directory().get(st.session_state.get('vendor_choice') or '')
+    if vendor is not None:
+        st.session_state['bill_to_name'] = vendor.name
+        st.session_state['bill_to_address'] = vendor.address
+        st.session_state['bill_to_phone'] = vendor.phone
+    st.session_state['vendor_choice'] = None
+
+def show_vendor_suggestions(query):
+    """Offer directory vendors matching the typed Bill To company"""
+    if not query.strip():
+        return
+    names = [vendor.name for vendor in get_vendor_directory().complete(query, limit=VENDOR_SUGGESTIONS)
+             if vendor.name != query]
+    if names:
+        st.selectbox("Matching vendors", names, index=None, key="vendor_choice",
+                     placeholder=f"{len(names)} matching vendor(s) - pick one to fill in the address",
+                     on_change=fill_bill_to)
+
+def import_vendors(uploaded_file):
+    """Add vendors from an uploaded CSV to the shared directory and save it"""
+    directory = get_vendor_directory()
+    try:
+        count, skipped = directory.load_csv(uploaded_file)
+    except VendorImportError as e:
+        st.error(f"❌ {e}")
+        return
+    directory.save_csv(vendors_path())
+    st.success(f"✅ Imported {count:,} vendors ({len(directory):,} in the directory)")
+    if skipped:
+        st.warning(f"Skipped {len(skipped):,} rows without a vendor name")
+
+def fill_item_from_catalog():
+    """Fill the item description and unit price from the picked catalog entry"""
+    item = get_catalog().get(st.session_state.get('catalog_choice') or '')
+    if item is not None:
+        st.session_state['item_name'] = item.description
+        st.session_state['item_price'] = item.unit_price
+    st.session_state['catalog_choice'] = None
 
-def calculate_totals():
-    """Calculate subtotal and total"""
-    if st.session_state['items']:
-        subtotal = sum(item['total'] for item in st.session_state['items'])
-        return subtotal, subtotal  # No tax calculation for now
-    return 0.0, 0.0
+def show_catalog_search():
+    """Search the product catalog by SKU or description"""
+    catalog = get_catalog()
+    if not len(catalog):
+        return
+    query = st.text_input("Find in catalog", key="catalog_query", placeholder="SKU or description")
+    if not query.strip():
+        return
+    matches = {item.sku: item for item in catalog.search(query, limit=CATALOG_SUGGESTIONS)}
+    if not matches:
+        st.caption("No catalog matches")
+        return
+    st.selectbox("Catalog matches", list(matches), index=None, key="catalog_choice",
+                 format_func=lambda sku: f"{sku} - {matches[sku].description} (Rs.{matches[sku].unit_price:,.2f})",
+                 placeholder=f"{len(matches)} match(es) - pick one to fill in the item",
+                 on_change=fill_item_from_catalog)
+
+def import_catalog_file(uploaded_file):
+    """Replace the shared product catalog with an uploaded CSV"""
+    try:
+        catalog, skipped = import_catalog(uploaded_file)
+    except CatalogImportError as e:
+        st.error(f"❌ {e}")
+        return
+    st.success(f"✅ Imported {len(catalog):,} catalog items")
+    if skipped:
+        st.warning(f"Skipped {len(skipped):,} rows without a SKU, description or valid price")
+
+def save_rendered_po(job, created_by):
+    """Keep a rendered order and its PDF in the history (runs on the render thread)"""
+    get_default_store().save(job.po_data, pdf=job.pdf, created_by=created_by)
+    # The number is used, so it is no longer held for the form or counted as a gap
+    get_default_allocator().confirm(job.po_data['po_number'])
+
+def render_status(job_id, polling):
+    """Progress of a background render, then its download button"""
+    job = get_render_queue().get(job_id)
+    if job is None:
+        return
+    if not job.finished:
+        label = "Waiting to render" if job.status == 'queued' else f"Rendering {job.po_data['po_number']}"
+        st.progress(job.progress, text=f"{label}... ({job.seconds:.1f}s)")
+        return
+    if polling:
+        # Finished while polling: rerun the page so the status stops refreshing
+        st.rerun()
+    
+    if job.status == 'failed':
+        st.error(f"Error generating PDF: {job.error}")
+        return
+    
+    # Download button
+    st.download_button(
+        label="Download Purchase Order PDF",
+        data=job.pdf,
+        file_name=f"PO_{job.po_data['po_number']}.pdf",
+        mime="application/pdf",
+        type="secondary",
+        use_container_width=True,
+        key=f"download_{job.job_id}"
+    )
+    
+    st.success("Purchase Order PDF generated successfully!")
+
+def show_render_status():
+    """Show the session's background render, refreshing only this section while it runs"""
+    job_id = st.session_state.get('render_job')
+    job = get_render_queue().get(job_id) if job_id else None
+    if job is None:
+        return
+    polling = not job.finished
+    st.fragment(render_status, run_every=RENDER_POLL_SECONDS if polling else None)(job_id, polling)
+
+def get_order():
+    """Return the session's purchase order, creating it on first use"""
+    if 'order' not in st.session_state:
+        from order import PurchaseOrder
+        st.session_state['order'] = PurchaseOrder()
+    return st.session_state['order']
+
+def apply_item_edits():
+    """Apply inline edits and deletions from the items grid"""
+    get_order().apply_editor_changes(st.session_state['items_editor'])
+
+def import_items(uploaded_file):
+    """Append line items from an uploaded CSV/Excel file"""
+    from line_items import LineItemImportError, read_line_items
+
+    try:
+        items, errors = read_line_items(uploaded_file)
+    except LineItemImportError as e:
+        st.error(f"❌ {e}")
+        return
+    get_order().add_items(items)
+    st.success(f"✅ Imported {len(items):,} items from {uploaded_file.name}")
+    if not errors.empty:
+        st.warning(f"Skipped {len(errors):,} invalid rows")
+        st.dataframe(errors.head(100), hide_index=True)
 
 def main():
     st.set_page_config(page_title="Purchase Order Generator", page_icon="📋", layout="wide")
     
     # Initialize session state
     initialize_session_state()
+    if os.environ.get(PREWARM_ENV):
+        start_prewarm()
     
     # Check authentication
-    if not st.session_state['authenticated']:
+    if not check_session():
         show_login_form()
         return
     
     # Show header with user info
     show_header()
+    refresh_po_number()
     
     st.title("📋 Purchase Order Generator")
+    show_history()
     st.markdown("---")
     
     # Company Information Section
@@ -137,10 +419,7 @@ def main():
     
     with col2:
         st.header("Order Details")
-        # Generate PO number
-        po_number = st.text_input("PO Number", 
-                                value=f"PO{datetime.now().strftime('%Y%m%d')}{st.session_state['po_counter']:03d}", 
-                                key="po_number")
+        po_number = st.text_input("PO Number", key="po_number")
         order_date = st.date_input("Order Date", value=datetime.now().date(), key="order_date")
         due_date = st.date_input("Due Date", 
                                value=(datetime.now() + timedelta(days=2)).date(), 
@@ -154,8 +433,14 @@ def main():
     with col1:
         st.header("Bill To:")
         bill_to_name = st.text_input("Bill To Company", key="bill_to_name")
+        show_vendor_suggestions(bill_to_name)
         bill_to_address = st.text_area("Bill To Address", key="bill_to_address")
         bill_to_phone = st.text_input("Bill To Phone", key="bill_to_phone")
+        with st.expander("Import Vendors from CSV"):
+            vendors_file = st.file_uploader("Vendor file (columns: name, address, phone)",
+                                            type=["csv"], key="vendors_file")
+            if vendors_file is not None and st.button("Import Vendors"):
+                import_vendors(vendors_file)
     
     with col2:
         st.header("Ship To:")
@@ -176,6 +461,7 @@ def main():
     
     # Add new item form
     with st.expander("Add New Item", expanded=True):
+        show_catalog_search()
         col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
         
         with col1:
@@ -194,38 +480,62 @@ def main():
         
         st.info("💡 Tip: After adding an item, manually clear the fields above to add another item.")
     
+    # Bulk import from an ERP export
+    with st.expander("Import Items from CSV/Excel"):
+        uploaded_file = st.file_uploader("Line items file (columns: item, quantity, unit_price)",
+                                         type=["csv", "xlsx"], key="items_file")
+        if uploaded_file is not None and st.button("Import Items"):
+            import_items(uploaded_file)
+    
+    with st.expander("Import Product Catalog from CSV"):
+        catalog_file = st.file_uploader("Catalog file (columns: sku, description, unit_price)",
+                                        type=["csv"], key="catalog_file")
+        if catalog_file is not None and st.button("Import Catalog"):
+            import_catalog_file(catalog_file)
+    
     # Display current items
-    if st.session_state['items']:
+    order = get_order()
+    if not order.empty:
         st.subheader("Current Items")
         
-        # Create DataFrame for display
-        df = pd.DataFrame(st.session_state['items'])
-        
-        # Display items with remove buttons
-        for i, item in enumerate(st.session_state['items']):
-            col1, col2, col3, col4, col5 = st.columns([3, 1, 1, 1, 1])
-            
-            with col1:
-                st.write(item['item'])
-            with col2:
-                st.write(f"{item['quantity']}")
-            with col3:
-                st.write(f"Rs.{item['unit_price']:,.2f}")
-            with col4:
-                st.write(f"Rs.{item['total']:,.2f}")
-            with col5:
-                if st.button("Remove", key=f"remove_{i}"):
-                    remove_item(i)
-                    st.rerun()
-        
-        # Calculate totals
-        subtotal, total = calculate_totals()
+        # Single virtualized grid backed by the session DataFrame, so render
+        # cost does not grow with the number of lines
+        st.data_editor(
+            order.items,
+            key="items_editor",
+            on_change=apply_item_edits,
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'item': st.column_config.TextColumn("Item", required=True),
+                'quantity': st.column_config.NumberColumn("Quantity", min_value=1, required=True),
+                'unit_price': st.column_config.NumberColumn("Unit Price (Rs.)", min_value=0.01,
+                                                            format="Rs.%.2f", required=True),
+                'total': st.column_config.NumberColumn("Total", format="Rs.%.2f", disabled=True),
+            }
+        )
+        st.caption("💡 Edit cells inline. Select rows and press Delete to remove them.")
         
+        # Totals are kept up to date by the order as lines change
         st.markdown("---")
         col1, col2 = st.columns([3, 1])
+        with col1:
+            col_a, col_b = st.columns(2)
+            with col_a:
+                discount = st.number_input("Discount (Rs.)", min_value=0.0, format="%.2f", key="discount")
+            with col_b:
+                tax_percent = st.number_input("Tax (%)", min_value=0.0, max_value=100.0,
+                                              format="%.2f", key="tax_percent")
+            order.discount = Decimal(str(discount))
+            order.tax_rate = Decimal(str(tax_percent)) / 100
         with col2:
-            st.write(f"**Subtotal: Rs.{subtotal:,.2f}**")
-            st.write(f"**Total: Rs.{total:,.2f}**")
+            st.write(f"**Subtotal: Rs.{order.subtotal:,.2f}**")
+            if order.discount_amount:
+                st.write(f"**Discount: -Rs.{order.discount_amount:,.2f}**")
+            if order.tax:
+                st.write(f"**Tax ({format_percent(order.tax_rate)}%): Rs.{order.tax:,.2f}**")
+            st.write(f"**Total: Rs.{order.total:,.2f}**")
     
     st.markdown("---")
     
@@ -245,57 +555,44 @@ def main():
     st.markdown("---")
     
     # Generate PDF Button
-    if st.session_state['items'] and bill_to_name:
-        if st.button("Generate Purchase Order PDF", type="primary", use_container_width=True):
-            try:
-                # Prepare data for PDF generation
-                po_data = {
-                    'company_name': company_name,
-                    'company_address': company_address,
-                    'company_phone': company_phone,
-                    'po_number': po_number,
-                    'order_date': order_date.strftime('%Y-%m-%d'),
-                    'due_date': due_date.strftime('%Y-%m-%d'),
-                    'bill_to_name': bill_to_name,
-                    'bill_to_address': bill_to_address,
-                    'bill_to_phone': bill_to_phone,
-                    'ship_to_name': ship_to_name,
-                    'ship_to_address': ship_to_address,
-                    'ship_to_phone': ship_to_phone,
-                    'items': st.session_state['items'],
-                    'subtotal': subtotal,
-                    'total': total,
-                    'notes': notes,
-                    'terms': terms
-                }
-                
-                # Generate PDF
-                pdf_generator = PurchaseOrderPDF()
-                pdf_buffer = pdf_generator.generate_pdf(po_data)
-                
-                # Download button
-                st.download_button(
-                    label="Download Purchase Order PDF",
-                    data=pdf_buffer.getvalue(),
-                    file_name=f"PO_{po_number}.pdf",
-                    mime="application/pdf",
-                    type="secondary",
-                    use_container_width=True
-                )
-                
-                st.success("Purchase Order PDF generated successfully!")
-                
-                # Increment PO counter for next order
-                st.session_state['po_counter'] += 1
-                
-            except Exception as e:
-                st.error(f"Error generating PDF: {str(e)}")
+    if not order.empty and bill_to_name:
+        generate = st.button("Generate Purchase Order PDF", type="primary", use_container_width=True)
+        if generate and get_default_store().exists(po_number):
+            # Stored orders are never overwritten; the render would fail to save anyway
+            st.error(f"❌ Purchase order {po_number} already exists. Use a different PO number.")
+        elif generate:
+            # Prepare data for PDF generation
+            po_data = {
+                'company_name': company_name,
+                'company_address': company_address,
+                'company_phone': company_phone,
+                'po_number': po_number,
+                'order_date': order_date.strftime('%Y-%m-%d'),
+                'due_date': due_date.strftime('%Y-%m-%d'),
+                'bill_to_name': bill_to_name,
+                'bill_to_address': bill_to_address,
+                'bill_to_phone': bill_to_phone,
+                'ship_to_name': ship_to_name,
+                'ship_to_address': ship_to_address,
+                'ship_to_phone': ship_to_phone,
+                'items': order.to_po_items(),
+                **order.totals(),
+                'notes': notes,
+                'terms': terms
+            }
+            
+            # Render in the background; clicking again while it runs joins the same job
+            job = get_render_queue().submit(po_data, on_done=partial(save_rendered_po,
+                                                                     created_by=st.session_state['user_email']))
+            st.session_state['render_job'] = job.job_id
     
     else:
-        if not st.session_state['items']:
+        if order.empty:
             st.warning("Please add at least one item to generate the purchase order.")
         if not bill_to_name:
             st.warning("Please fill in the Bill To information.")
+    
+    show_render_status()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""Merged purchase order archives.
+
+Renders many purchase orders into a single PDF, each starting on a new
+page with its own entry in the document outline (bookmarks), so finance
+can page through a batch in one file. Orders are laid out in template
+mode: the letterhead form, its logo and the fonts are written once per
+file and shared by every order from the same company.
+
+ReportLab keeps a document in memory until it is saved, so large batches
+are split into volumes of a bounded number of orders (see
+batch.generate_merged); memory then depends on the volume size rather
+than the batch size.
+
+Imported on first use by batch.py; it pulls in ReportLab at import time.
+"""
+from reportlab.platypus import Flowable, PageBreak
+from pdf_generator import PurchaseOrderPDF
+
+
+class Bookmark(Flowable):
+    """Zero-size flowable adding an outline entry that points at the page it lands on"""
+
+    def __init__(self, key, title):
+        super().__init__()
+        self.key = key
+        self.title = title
+        self.width = self.height = 0
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        self.canv.bookmarkPage(self.key)
+        self.canv.addOutlineEntry(self.title, self.key, level=0)
+        self.canv.showOutline()
+
+
+def outline_title(po_data):
+    """Bookmark text for one order: PO number and Bill To company"""
+    if po_data.get('bill_to_name'):
+        return f"{po_data['po_number']} - {po_data['bill_to_name']}"
+    return str(po_data['po_number'])
+
+
+def render_merged(orders, output, pdf=None):
+    """Render orders into one PDF at output (a path or binary file object).
+
+    pdf is the PurchaseOrderPDF laying out each order; by default a
+    template-mode one, so letterheads are shared. Returns the page count.
+    """
+    pdf = pdf or PurchaseOrderPDF(template_mode=True)
+    story = []
+    for index, po_data in enumerate(orders):
+        if story:
+            story.append(PageBreak())
+        story.append(Bookmark(f"po{index}", outline_title(po_data)))
+        story.extend(pdf.build_story(po_data))
+
+    doc = pdf.make_doc(output)
+    doc.title = "Purchase Orders"
+    doc.build(story)
+    return doc.page
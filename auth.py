@@ -0,0 +1,310 @@
+"""User accounts and signed login sessions.
+
+Users live in the same SQLite database as the PO store, with passwords
+hashed by scrypt under a per-user random salt. The hash cost is tunable
+(PO_AUTH_HASH_COST, log2 of scrypt's N) and older hashes are upgraded on
+the next successful login.
+
+A login issues a session token: the user, an expiry and a session id,
+signed with HMAC-SHA256 under a secret kept in the database. Every rerun
+only checks the signature (constant time) and the expiry; whether the
+session was revoked by a logout is looked up at most every
+SESSION_RECHECK_SECONDS. Because the secret and the sessions table are in
+the shared database, a token issued by one Streamlit replica is accepted
+by the others.
+
+Failed logins are counted per user in the database, and a user with
+MAX_FAILED_LOGINS failures within FAILED_LOGIN_WINDOW seconds is refused
+without checking the password until the window has passed.
+
+No accounts exist until they are added with the CLI (or, for a local
+trial, the demo accounts are seeded with PO_AUTH_DEMO_USERS=1).
+
+Usage:
+    python auth.py add-user someone@example.com
+    python auth.py remove-user someone@example.com
+"""
+import argparse
+import base64
+import getpass
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import namedtuple
+from po_store import DEFAULT_STORE_PATH, STORE_PATH_ENV, connect
+
+# log2 of scrypt's N; each step doubles the time and memory of a password check
+HASH_COST_ENV = 'PO_AUTH_HASH_COST'
+DEFAULT_HASH_COST = 14
+SCRYPT_BLOCK_SIZE = 8
+SCRYPT_PARALLELISM = 1
+
+SESSION_SECONDS = 8 * 60 * 60
+# How long a verified session is trusted before checking it was not revoked
+SESSION_RECHECK_SECONDS = 30
+
+MAX_FAILED_LOGINS = 5
+FAILED_LOGIN_WINDOW = 5 * 60
+
+# Set PO_AUTH_DEMO_USERS=1 to create these accounts when the user table is
+# empty; their passwords are public, so only for local trials
+DEMO_USERS_ENV = 'PO_AUTH_DEMO_USERS'
+DEMO_USERS = {
+    "admin@kovanlabs.com": "admin123",
+    "manager@kovanlabs.com": "manager123",
+    "user@kovanlabs.com": "password123",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    email TEXT PRIMARY KEY COLLATE NOCASE,
+    password_hash TEXT NOT NULL,
+    created_at TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS user_sessions (
+    session_id TEXT PRIMARY KEY,
+    email TEXT NOT NULL COLLATE NOCASE,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS login_failures (
+    email TEXT NOT NULL COLLATE NOCASE,
+    failed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_login_failures_email ON login_failures (email, failed_at);
+CREATE TABLE IF NOT EXISTS auth_settings (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Outcome of UserStore.login: token is None unless the login succeeded;
+# retry_after is the seconds left on a rate-limited user
+LoginResult = namedtuple('LoginResult', ['token', 'email', 'retry_after'])
+
+_default_store_lock = threading.Lock()
+_default_store = None
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def hash_password(password, cost=DEFAULT_HASH_COST):
+    """scrypt hash of password under a new random salt, with its parameters"""
+    salt = secrets.token_bytes(16)
+    digest = _scrypt(password, salt, cost)
+    return f"scrypt${cost}${SCRYPT_BLOCK_SIZE}${SCRYPT_PARALLELISM}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def _scrypt(password, salt, cost, block_size=SCRYPT_BLOCK_SIZE, parallelism=SCRYPT_PARALLELISM):
+    n = 2 ** cost
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=block_size, p=parallelism,
+                          maxmem=256 * n * block_size, dklen=32)
+
+
+def verify_password(password, password_hash):
+    """Whether password matches password_hash, compared in constant time"""
+    try:
+        scheme, cost, block_size, parallelism, salt, digest = password_hash.split('$')
+        if scheme != 'scrypt':
+            return False
+        expected = _b64decode(digest)
+        actual = _scrypt(password, _b64decode(salt), int(cost), int(block_size), int(parallelism))
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+def hash_cost(password_hash):
+    """The cost a stored hash was made with, or None if it cannot be read"""
+    try:
+        return int(password_hash.split('$')[1])
+    except (IndexError, ValueError):
+        return None
+
+
+class UserStore:
+    def __init__(self, path=DEFAULT_STORE_PATH, cost=None):
+        self.path = path
+        self.cost = cost or int(os.environ.get(HASH_COST_ENV) or DEFAULT_HASH_COST)
+        self._lock = threading.Lock()
+        self._checked = {}  # session_id -> monotonic time it was last found active
+        self._connect().executescript(SCHEMA)
+        self._secret = self._load_secret()
+        # Spent on unknown users so they take as long as wrong passwords
+        self._dummy_hash = hash_password(secrets.token_hex(8), self.cost)
+
+    def _connect(self):
+        return connect(self.path)
+
+    def _load_secret(self):
+        """The signing secret shared by every process using this database, created on first use"""
+        conn = self._connect()
+        conn.execute("INSERT OR IGNORE INTO auth_settings (name, value) VALUES ('session_secret', ?)",
+                     (secrets.token_hex(32),))
+        (secret,) = conn.execute("SELECT value FROM auth_settings WHERE name = 'session_secret'").fetchone()
+        return bytes.fromhex(secret)
+
+    def add_user(self, email, password):
+        """Create or replace a user"""
+        self._connect().execute(
+            """INSERT INTO users (email, password_hash, created_at) VALUES (?, ?, datetime('now'))
+               ON CONFLICT (email) DO UPDATE SET password_hash = excluded.password_hash""",
+            (email.strip(), hash_password(password, self.cost))
+        )
+
+    def remove_user(self, email):
+        """Delete a user and end their sessions; returns whether the user existed"""
+        conn = self._connect()
+        conn.execute("DELETE FROM user_sessions WHERE email = ?", (email.strip(),))
+        return conn.execute("DELETE FROM users WHERE email = ?", (email.strip(),)).rowcount > 0
+
+    def seed_demo_users(self):
+        """Create the demo accounts if there are no users yet"""
+        (count,) = self._connect().execute("SELECT COUNT(*) FROM users").fetchone()
+        if count == 0:
+            for email, password in DEMO_USERS.items():
+                self.add_user(email, password)
+
+    def retry_after(self, email, now=None):
+        """Seconds until email may try to log in again; 0 if not rate limited"""
+        now = now or time.time()
+        rows = self._connect().execute(
+            "SELECT failed_at FROM login_failures WHERE email = ? AND failed_at > ? ORDER BY failed_at DESC",
+            (email, now - FAILED_LOGIN_WINDOW)
+        ).fetchall()
+        if len(rows) < MAX_FAILED_LOGINS:
+            return 0
+        # Wait until the oldest of the last MAX_FAILED_LOGINS failures leaves the window
+        return rows[MAX_FAILED_LOGINS - 1][0] + FAILED_LOGIN_WINDOW - now
+
+    def login(self, email, password):
+        """Check credentials and issue a session token, returning a LoginResult"""
+        email = email.strip()
+        now = time.time()
+        retry_after = self.retry_after(email, now)
+        if retry_after > 0:
+            return LoginResult(None, email, retry_after)
+
+        conn = self._connect()
+        row = conn.execute("SELECT email, password_hash FROM users WHERE email = ?", (email,)).fetchone()
+        if row is None:
+            verify_password(password, self._dummy_hash)
+            valid = False
+        else:
+            email, password_hash = row
+            valid = verify_password(password, password_hash)
+
+        if not valid:
+            conn.execute("INSERT INTO login_failures (email, failed_at) VALUES (?, ?)", (email, now))
+            conn.execute("DELETE FROM login_failures WHERE failed_at < ?", (now - FAILED_LOGIN_WINDOW,))
+            return LoginResult(None, email, 0)
+
+        conn.execute("DELETE FROM login_failures WHERE email = ?", (email,))
+        if hash_cost(password_hash) != self.cost:
+            self.add_user(email, password)
+        return LoginResult(self.create_session(email, now), email, 0)
+
+    def create_session(self, email, now=None):
+        """Record a new session for email and return its signed token"""
+        now = now or time.time()
+        session_id = secrets.token_hex(16)
+        expires_at = int(now + SESSION_SECONDS)
+        conn = self._connect()
+        conn.execute("INSERT INTO user_sessions (session_id, email, expires_at) VALUES (?, ?, ?)",
+                     (session_id, email, expires_at))
+        conn.execute("DELETE FROM user_sessions WHERE expires_at < ?", (now,))
+        payload = _b64encode(f"{session_id}:{expires_at}:{email}".encode('utf-8'))
+        return f"{payload}.{self._sign(payload)}"
+
+    def _sign(self, payload):
+        return _b64encode(hmac.new(self._secret, payload.encode('utf-8'), hashlib.sha256).digest())
+
+    def _parse(self, token):
+        """(session_id, expires_at, email) of a token with a valid signature, else None"""
+        payload, _, signature = (token or '').partition('.')
+        if not hmac.compare_digest(self._sign(payload).encode('ascii'), signature.encode('utf-8')):
+            return None
+        try:
+            session_id, expires_at, email = _b64decode(payload).decode('utf-8').split(':', 2)
+            return session_id, int(expires_at), email
+        except ValueError:
+            return None
+
+    def verify_session(self, token):
+        """Email of the user a token belongs to, or None if it is invalid, expired or revoked"""
+        parsed = self._parse(token)
+        if parsed is None:
+            return None
+        session_id, expires_at, email = parsed
+        if expires_at < time.time():
+            return None
+
+        checked_at = self._checked.get(session_id)
+        now = time.monotonic()
+        if checked_at is None or now - checked_at > SESSION_RECHECK_SECONDS:
+            active = self._connect().execute(
+                "SELECT 1 FROM user_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            with self._lock:
+                if active is None:
+                    self._checked.pop(session_id, None)
+                    return None
+                if len(self._checked) > 10000:
+                    self._checked.clear()
+                self._checked[session_id] = now
+        return email
+
+    def end_session(self, token):
+        """Revoke the session a token belongs to"""
+        parsed = self._parse(token)
+        if parsed is not None:
+            with self._lock:
+                self._checked.pop(parsed[0], None)
+            self._connect().execute("DELETE FROM user_sessions WHERE session_id = ?", (parsed[0],))
+
+
+def get_user_store():
+    """Return the process-wide user store backed by the PO store database"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                store = UserStore(os.environ.get(STORE_PATH_ENV) or DEFAULT_STORE_PATH)
+                if os.environ.get(DEMO_USERS_ENV):
+                    store.seed_demo_users()
+                _default_store = store
+    return _default_store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage Purchase Order Generator users")
+    commands = parser.add_subparsers(dest='command', required=True)
+    add = commands.add_parser('add-user', help="Create a user or reset their password")
+    add.add_argument('email')
+    remove = commands.add_parser('remove-user', help="Delete a user and end their sessions")
+    remove.add_argument('email')
+    args = parser.parse_args(argv)
+
+    store = UserStore(os.environ.get(STORE_PATH_ENV) or DEFAULT_STORE_PATH)
+    if args.command == 'add-user':
+        password = getpass.getpass("Password: ")
+        if password != getpass.getpass("Repeat password: "):
+            parser.error("Passwords do not match")
+        store.add_user(args.email, password)
+        print(f"Saved user {args.email}")
+    elif store.remove_user(args.email):
+        print(f"Removed user {args.email}")
+    else:
+        print(f"No user {args.email}")
+
+
+if __name__ == "__main__":
+    main()
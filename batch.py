@@ -0,0 +1,422 @@
+"""Batch purchase order generation.
+
+Renders many purchase orders across a process pool, using the same po_data
+shape that app.py builds from the form. Input is either a JSON array of
+po_data objects or a JSON Lines file with one po_data object per line.
+
+Orders without a po_number are given one from the shared PO number
+allocator, reserved in blocks so a large batch needs only a handful of
+database round trips.
+
+Instead of one PDF per order, --merged writes the batch as a single PDF
+with a bookmark per order, split into volumes of --volume-size orders.
+
+--data writes the normalized order data of the batch to a JSON Lines or
+Parquet file for downstream systems, and --embed-data attaches each
+order's data to its PDF (see sidecar.py).
+
+Usage:
+    python batch.py orders.jsonl --out-dir purchase_orders/
+    python batch.py orders.jsonl --zip purchase_orders.zip --workers 8
+    python batch.py orders.jsonl --merged purchase_orders.pdf --volume-size 1000
+    python batch.py orders.jsonl --out-dir purchase_orders/ --data purchase_orders.parquet
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from metrics import RenderMetrics
+from normalize import PODataError, normalize_po_data
+from pdf_cache import CachedPurchaseOrderPDF
+from pdf_generator import prewarm
+from po_numbers import BlockAllocator, get_default_allocator
+from sidecar import open_data_writer, parquet_available
+
+# pdf_bytes is None when the worker wrote the PDF straight to path; profile is
+# the RenderProfile.to_dict() of the render when workers profile, else None
+BatchResult = namedtuple('BatchResult', ['index', 'po_number', 'file_name', 'pdf_bytes', 'path',
+                                         'size', 'seconds', 'cached', 'profile'], defaults=(None,))
+
+# One merged PDF holding the orders first_po to last_po
+VolumeResult = namedtuple('VolumeResult', ['number', 'path', 'first_po', 'last_po', 'count',
+                                           'pages', 'size', 'seconds'])
+
+# Orders per merged PDF; bounds the memory of each worker
+DEFAULT_VOLUME_SIZE = 1000
+
+# Characters kept in PDF file names; anything else in a PO number (path
+# separators, "..", spaces) becomes "_" so the file stays inside --out-dir
+UNSAFE_FILE_NAME_CHARS = re.compile(r'[^\w.-]+')
+
+# Per-worker generator, created once by init_worker
+_worker_pdf = None
+# Profile of the render running on this thread (workers may be threads in tests)
+_worker_profile = threading.local()
+
+
+def _keep_profile(profile):
+    _worker_profile.last = profile.to_dict()
+
+
+def init_worker(profile=False, embed_data=False, memory_tier=True, template_mode=False):
+    """Warm the shared styles and logo once per worker process; profile times each render stage.
+
+    template_mode draws each company's letterhead once as a shared form.
+    It saves a few milliseconds per order and bytes in merged PDFs, where
+    the form is stored once for many orders, but makes a standalone PDF
+    about 6% larger, so only merged output uses it. embed_data attaches
+    each order's data to its PDF.
+    memory_tier=False keeps rendered PDFs out of the cache's memory tier, so
+    each one goes straight to its file (copied to the disk tier if set); batch
+    runs use it because their orders are rarely repeated, while the service
+    keeps the memory tier for repeated requests.
+    """
+    global _worker_pdf
+    prewarm()
+    _worker_pdf = CachedPurchaseOrderPDF(profile_hook=_keep_profile if profile else None,
+                                         template_mode=template_mode, embed_data=embed_data, memory_tier=memory_tier)
+
+
+def render_document(index, po_data, out_dir=None):
+    """Render a single purchase order inside a worker process.
+
+    With out_dir the PDF is written directly to a file there and only its
+    path travels back to the parent process; otherwise the bytes are returned.
+    """
+    start = time.perf_counter()
+    _worker_profile.last = None
+    file_name = pdf_file_name(po_data)
+    if out_dir is not None:
+        path = os.path.join(out_dir, file_name)
+        _worker_pdf.generate_pdf(po_data, path)
+        pdf_bytes = None
+        size = os.path.getsize(path)
+    else:
+        path = None
+        pdf_bytes = _worker_pdf.generate_pdf(po_data).getvalue()
+        size = len(pdf_bytes)
+    seconds = time.perf_counter() - start
+    return BatchResult(index, po_data['po_number'], file_name, pdf_bytes, path, size, seconds,
+                       _worker_pdf.last_cache_hit, _worker_profile.last)
+
+
+def render_volume(number, orders, path):
+    """Render a list of orders into one merged PDF at path inside a worker process"""
+    from archive import render_merged
+
+    start = time.perf_counter()
+    pages = render_merged(orders, path, _worker_pdf)
+    return VolumeResult(number, path, orders[0]['po_number'], orders[-1]['po_number'], len(orders),
+                        pages, os.path.getsize(path), time.perf_counter() - start)
+
+
+def pdf_file_name(po_data):
+    """File name used for a purchase order PDF, as in app.py's download but safe to join to a directory.
+
+    PO numbers such as "PO/2024/1" would otherwise name a missing directory,
+    and "../x" a file outside the output directory or ZIP root.
+    """
+    return f"PO_{UNSAFE_FILE_NAME_CHARS.sub('_', str(po_data['po_number']))}.pdf"
+
+
+def read_orders(path):
+    """Yield po_data dicts from a JSON array or JSON Lines file.
+
+    A JSON Lines row that is not valid JSON yields a PODataError in its
+    place, so one bad row does not stop the batch (see skip_invalid).
+    """
+    with open(path, encoding='utf-8') as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == '[':
+            yield from json.load(f)
+            return
+        for line_number, line in enumerate(f, start=1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield PODataError([f"line {line_number} is not valid JSON: {e.msg}"])
+
+
+def skip_invalid(orders, rejected):
+    """Yield the orders that can be laid out, reporting the others as they are read.
+
+    Each rejected order is printed to stderr and appended to rejected as
+    (order number, problems), numbered from 1 in input order.
+    """
+    for number, po_data in enumerate(orders, start=1):
+        try:
+            if isinstance(po_data, PODataError):
+                raise po_data
+            normalize_po_data(po_data, require_po_number=False)
+        except PODataError as e:
+            rejected.append((number, e.problems))
+            print(f"Skipped order {number}: {'; '.join(e.problems)}", file=sys.stderr)
+            continue
+        yield po_data
+
+
+def assign_po_numbers(orders, block_size=100):
+    """Yield orders, giving those without a po_number the next allocated number.
+
+    Numbers are reserved block_size at a time, and only once an order
+    actually needs one; unused numbers of the last block are released as gaps.
+    """
+    numbers = None
+    try:
+        for po_data in orders:
+            if not po_data.get('po_number'):
+                if numbers is None:
+                    numbers = BlockAllocator(get_default_allocator(), block_size)
+                po_data['po_number'] = numbers.next()
+            yield po_data
+    finally:
+        if numbers is not None:
+            numbers.close()
+
+
+def record_orders(orders, writer):
+    """Write each order's normalized data with writer (see sidecar.open_data_writer), yielding the orders through"""
+    for po_data in orders:
+        writer.write(po_data)
+        yield po_data
+
+
+def generate_batch(orders, workers=None, max_in_flight=None, out_dir=None, profile=False, embed_data=False):
+    """Render an iterable of po_data dicts, yielding BatchResult as each completes.
+
+    At most max_in_flight documents are queued or rendering at any time
+    (default: twice the worker count), so orders is consumed lazily and
+    memory stays flat regardless of batch size. Results arrive in
+    completion order; use BatchResult.index to restore input order.
+    With out_dir, workers write each PDF straight to disk there. With
+    profile, each rendered result carries its per-stage timings. With
+    embed_data, each PDF carries its order data as an attachment.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(profile, embed_data, False)) as executor:
+        pending = set()
+        for index, po_data in enumerate(orders):
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(render_document, index, po_data, out_dir))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def split_volumes(orders, volume_size):
+    """Yield (orders, only) lists of at most volume_size orders; only is True for a single volume"""
+    volume = []
+    count = 0
+    for po_data in orders:
+        if len(volume) == volume_size:
+            yield volume, False
+            count += 1
+            volume = []
+        volume.append(po_data)
+    if volume:
+        yield volume, count == 0
+
+
+def volume_path(path, number, only):
+    """path itself for a single volume, else path with a volume number, e.g. orders_002.pdf"""
+    if only:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}_{number:03d}{ext or '.pdf'}"
+
+
+def generate_merged(orders, path, volume_size=DEFAULT_VOLUME_SIZE, workers=None):
+    """Render orders into merged PDFs with a bookmark per order, yielding VolumeResult as each is written.
+
+    A batch of up to volume_size orders becomes a single file at path;
+    larger batches are split into numbered volumes next to it. Each worker
+    renders a whole volume and at most one volume per worker is queued, so
+    memory is bounded by the volume size however long the batch is.
+    """
+    workers = workers or os.cpu_count() or 1
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(False, False, True, True)) as executor:
+        pending = set()
+        for number, (volume, only) in enumerate(split_volumes(orders, volume_size), start=1):
+            if len(pending) >= workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(render_volume, number, volume, volume_path(path, number, only)))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def write_files(results, out_dir):
+    """Write in-memory results to out_dir as they arrive, yielding the results through"""
+    os.makedirs(out_dir, exist_ok=True)
+    for result in results:
+        if result.pdf_bytes is not None:
+            with open(os.path.join(out_dir, result.file_name), 'wb') as f:
+                f.write(result.pdf_bytes)
+        yield result
+
+
+def write_zip(results, zip_path, remove_files=False):
+    """Stream each result into a ZIP archive as it arrives, yielding the results through.
+
+    Results written to disk are copied into the archive from their file in
+    chunks; remove_files deletes those files once archived.
+    """
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for result in results:
+            if result.pdf_bytes is None:
+                zf.write(result.path, result.file_name)
+                if remove_files:
+                    os.remove(result.path)
+            else:
+                zf.writestr(result.file_name, result.pdf_bytes)
+            yield result
+
+
+def collect_metrics(results, metrics):
+    """Record each result in a RenderMetrics, yielding the results through"""
+    for result in results:
+        metrics.observe(result.profile, result.cached)
+        yield result
+
+
+def report(results, quiet=False):
+    """Consume results, printing per-document timings and a summary"""
+    start = time.perf_counter()
+    count = 0
+    cache_hits = 0
+    render_seconds = 0.0
+    for result in results:
+        count += 1
+        cache_hits += result.cached
+        render_seconds += result.seconds
+        if not quiet:
+            print(f"{result.file_name}\t{result.seconds * 1000:.1f} ms\t{result.size:,} bytes")
+
+    elapsed = time.perf_counter() - start
+    average_ms = render_seconds / count * 1000 if count else 0.0
+    hit_rate = cache_hits / count * 100 if count else 0.0
+    print(f"Generated {count} purchase orders in {elapsed:.2f}s "
+          f"(avg render {average_ms:.1f} ms/document, cache hit rate {hit_rate:.1f}%)", file=sys.stderr)
+
+
+def report_volumes(results, quiet=False):
+    """Consume merged volume results, printing each volume and a summary"""
+    start = time.perf_counter()
+    volumes = 0
+    count = 0
+    pages = 0
+    for result in results:
+        volumes += 1
+        count += result.count
+        pages += result.pages
+        if not quiet:
+            print(f"{os.path.basename(result.path)}\t{result.first_po} to {result.last_po}\t"
+                  f"{result.count} orders\t{result.pages} pages\t{result.size:,} bytes\t{result.seconds:.2f}s")
+
+    elapsed = time.perf_counter() - start
+    print(f"Merged {count} purchase orders into {volumes} PDF(s) of {pages} pages in {elapsed:.2f}s",
+          file=sys.stderr)
+
+
+def write_documents(orders, args):
+    """Render orders to individual PDFs as the command line asked, then report"""
+    with tempfile.TemporaryDirectory(prefix='po_batch_') as staging_dir:
+        # Workers write PDFs to disk; for ZIP output they are staged and archived one by one
+        out_dir = args.out_dir or staging_dir
+        results = generate_batch(orders, workers=args.workers, max_in_flight=args.max_in_flight,
+                                 out_dir=out_dir, profile=bool(args.metrics_path), embed_data=args.embed_data)
+        if args.zip_path:
+            results = write_zip(results, args.zip_path, remove_files=True)
+        if args.metrics_path:
+            metrics = RenderMetrics()
+            results = collect_metrics(results, metrics)
+        report(results, args.quiet)
+
+    if args.metrics_path == '-':
+        sys.stdout.write(metrics.render_text())
+    elif args.metrics_path:
+        with open(args.metrics_path, 'w') as f:
+            f.write(metrics.render_text())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate purchase order PDFs in bulk")
+    parser.add_argument('input', help="JSON array or JSON Lines file of po_data objects")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('--out-dir', help="Directory to write individual PDFs into")
+    output.add_argument('--zip', dest='zip_path', help="ZIP archive to write PDFs into")
+    output.add_argument('--merged', dest='merged_path',
+                        help="Single PDF to merge all orders into, with a bookmark per order")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--max-in-flight', type=int, default=None,
+                        help="Maximum documents queued at once (default: 2 x workers)")
+    parser.add_argument('--number-block', type=int, default=100,
+                        help="PO numbers reserved at a time for orders without one (default: 100)")
+    parser.add_argument('--metrics', dest='metrics_path',
+                        help="Profile render stages and write Prometheus metrics to this file ('-' for stdout)")
+    parser.add_argument('--volume-size', type=int, default=DEFAULT_VOLUME_SIZE,
+                        help=f"Orders per merged PDF; larger batches are split into numbered volumes "
+                             f"(default: {DEFAULT_VOLUME_SIZE})")
+    parser.add_argument('--data', dest='data_path',
+                        help="Also write the normalized order data to this .jsonl or .parquet file")
+    parser.add_argument('--embed-data', action='store_true',
+                        help="Attach each order's data to its PDF as po_data.json")
+    parser.add_argument('--quiet', action='store_true', help="Only print the summary")
+    args = parser.parse_args(argv)
+    if args.merged_path and (args.metrics_path or args.embed_data):
+        parser.error("--metrics and --embed-data are not supported with --merged")
+    if args.data_path and args.data_path.lower().endswith('.parquet') and not parquet_available():
+        parser.error("Parquet output needs pyarrow (pip install pyarrow)")
+
+    # Invalid orders are skipped before numbering, so they use up no PO numbers
+    rejected = []
+    orders = assign_po_numbers(skip_invalid(read_orders(args.input), rejected), args.number_block)
+    if args.data_path:
+        writer = open_data_writer(args.data_path)
+        orders = record_orders(orders, writer)
+    try:
+        if args.merged_path:
+            report_volumes(generate_merged(orders, args.merged_path, args.volume_size, args.workers), args.quiet)
+        else:
+            write_documents(orders, args)
+    finally:
+        if args.data_path:
+            writer.close()
+
+    if rejected:
+        print(f"Skipped {len(rejected)} invalid purchase orders", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""PO number allocator contention benchmark.
+
+Starts several worker processes, each running several threads, that all
+draw PO numbers from one allocator database at the same time, either one
+number per round trip or through BlockAllocator with a range of block
+sizes. Reports throughput for each case and checks that no number was
+handed out twice.
+
+Usage:
+    python benchmarks/allocator.py
+    python benchmarks/allocator.py --processes 8 --threads 4 --numbers 2000 --blocks 1 10 100
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from po_numbers import BlockAllocator, PONumberAllocator  # noqa: E402
+
+DEFAULT_BLOCKS = [1, 10, 100]
+
+
+def draw_numbers(db_path, threads, numbers, block_size, start_event, results):
+    """Worker process: draw numbers per thread, sending every number back"""
+    allocator = PONumberAllocator(db_path)
+    drawn = []
+    lock = threading.Lock()
+
+    def run():
+        if block_size == 1:
+            local = [allocator.allocate() for _ in range(numbers)]
+        else:
+            with BlockAllocator(allocator, block_size) as block:
+                local = [block.next() for _ in range(numbers)]
+        with lock:
+            drawn.extend(local)
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    start_event.wait()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put(drawn)
+
+
+def run_case(processes, threads, numbers, block_size):
+    with tempfile.TemporaryDirectory(prefix='po_alloc_') as tmp:
+        db_path = os.path.join(tmp, 'allocator.db')
+        PONumberAllocator(db_path)  # create the schema before the workers race for it
+        start_event = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=draw_numbers,
+                                           args=(db_path, threads, numbers, block_size, start_event, results))
+                   for _ in range(processes)]
+        for worker in workers:
+            worker.start()
+        time.sleep(0.5)  # let the workers import and connect
+
+        start = time.perf_counter()
+        start_event.set()
+        drawn = []
+        for _ in workers:
+            drawn.extend(results.get())
+        elapsed = time.perf_counter() - start
+        for worker in workers:
+            worker.join()
+
+    return {
+        'block_size': block_size,
+        'numbers': len(drawn),
+        'seconds': round(elapsed, 3),
+        'per_second': round(len(drawn) / elapsed),
+        'duplicates': len(drawn) - len(set(drawn)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark PO number allocation under contention")
+    parser.add_argument('--processes', type=int, default=4, help="Competing processes")
+    parser.add_argument('--threads', type=int, default=4, help="Threads per process")
+    parser.add_argument('--numbers', type=int, default=500, help="Numbers drawn per thread")
+    parser.add_argument('--blocks', type=int, nargs='+', default=DEFAULT_BLOCKS,
+                        help="Block sizes; 1 allocates one number per round trip")
+    parser.add_argument('--json', dest='json_path', help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    print(f"{args.processes} processes x {args.threads} threads x {args.numbers} numbers")
+    print(f"{'block':>6} {'numbers':>8} {'seconds':>8} {'numbers/s':>10} {'duplicates':>10}")
+    results = []
+    failed = False
+    for block_size in args.blocks:
+        result = run_case(args.processes, args.threads, args.numbers, block_size)
+        results.append(result)
+        failed = failed or result['duplicates'] > 0
+        print(f"{block_size:>6} {result['numbers']:>8} {result['seconds']:>8.2f} "
+              f"{result['per_second']:>10,} {result['duplicates']:>10}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Login and session check throughput benchmark.
+
+For each password hash cost, logs one user in repeatedly from several
+threads and reports logins per second and the time of a single login,
+which is what a user waits for on the login form. Then measures the
+per-rerun session check, both when the session was recently verified
+(signature and expiry only) and when it has to be looked up again.
+
+Usage:
+    python benchmarks/login.py
+    python benchmarks/login.py --costs 12 14 16 --threads 4 --logins 50
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import auth  # noqa: E402
+
+DEFAULT_COSTS = [12, 14, 16]
+EMAIL = 'bench@example.com'
+PASSWORD = 'correct horse battery staple'
+
+
+def run_logins(store, threads, logins):
+    """Seconds for threads x logins successful logins"""
+    def run():
+        for _ in range(logins):
+            if store.login(EMAIL, PASSWORD).token is None:
+                raise RuntimeError("login failed")
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def run_case(cost, threads, logins):
+    with tempfile.TemporaryDirectory(prefix='po_auth_') as tmp:
+        store = auth.UserStore(os.path.join(tmp, 'auth.db'), cost=cost)
+        store.add_user(EMAIL, PASSWORD)
+
+        start = time.perf_counter()
+        store.login(EMAIL, PASSWORD)
+        single = time.perf_counter() - start
+
+        elapsed = run_logins(store, threads, logins)
+    return {
+        'cost': cost,
+        'logins': threads * logins,
+        'login_ms': round(single * 1000, 2),
+        'per_second': round(threads * logins / elapsed, 1),
+    }
+
+
+def run_session_checks(checks):
+    """Microseconds per session check, cached and with a database lookup each time"""
+    with tempfile.TemporaryDirectory(prefix='po_auth_') as tmp:
+        store = auth.UserStore(os.path.join(tmp, 'auth.db'), cost=10)
+        token = store.create_session(EMAIL)
+        results = {}
+        for name, recheck_seconds in [('cached_us', auth.SESSION_RECHECK_SECONDS), ('lookup_us', -1)]:
+            auth.SESSION_RECHECK_SECONDS = recheck_seconds
+            start = time.perf_counter()
+            for _ in range(checks):
+                if store.verify_session(token) != EMAIL:
+                    raise RuntimeError("session check failed")
+            results[name] = round((time.perf_counter() - start) / checks * 1e6, 2)
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark login and session check throughput")
+    parser.add_argument('--costs', type=int, nargs='+', default=DEFAULT_COSTS,
+                        help="Password hash costs (log2 of scrypt N) to compare")
+    parser.add_argument('--threads', type=int, default=4, help="Concurrent login threads")
+    parser.add_argument('--logins', type=int, default=20, help="Logins per thread")
+    parser.add_argument('--checks', type=int, default=20000, help="Session checks to time")
+    parser.add_argument('--json', dest='json_path', help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    print(f"{args.threads} threads x {args.logins} logins")
+    print(f"{'cost':>5} {'logins':>7} {'login ms':>9} {'logins/s':>9}")
+    results = []
+    for cost in args.costs:
+        result = run_case(cost, args.threads, args.logins)
+        results.append(result)
+        print(f"{cost:>5} {result['logins']:>7} {result['login_ms']:>9.2f} {result['per_second']:>9,.1f}")
+
+    sessions = run_session_checks(args.checks)
+    print(f"Session check: {sessions['cached_us']:.2f} us cached, {sessions['lookup_us']:.2f} us with lookup")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results, 'sessions': sessions}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
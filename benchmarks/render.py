@@ -0,0 +1,196 @@
+"""PDF rendering benchmark across document sizes.
+
+Renders synthetic purchase orders with 1 to 10,000 line items and short,
+mixed or long item descriptions (long ones exercise the CJK word wrap in
+the ItemDescription style), always including notes and terms. For each
+case it reports story construction time, doc.build time, peak traced
+memory, page count and output size. Results can be written as JSON and
+compared against a previous run.
+
+Usage:
+    python benchmarks/render.py
+    python benchmarks/render.py --sizes 1 100 1000 --json after.json --compare before.json
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pdf_generator import PurchaseOrderPDF, prewarm  # noqa: E402
+
+DEFAULT_SIZES = [1, 10, 100, 1000, 10000]
+DESCRIPTION_MODES = ['short', 'mixed', 'long']
+
+WORDS = ("steel bracket assembly hex bolt washer gasket bearing housing flange "
+         "coupling sensor module controller cable harness enclosure panel mount "
+         "fastener spring valve seal adapter connector").split()
+
+NOTES = "Deliver to the receiving dock between 9am and 5pm. Quote the PO number on every invoice."
+TERMS = "Upon accepting this purchase order, you hereby agree to the terms & conditions."
+
+
+def make_description(rng, mode):
+    if mode == 'short':
+        words = rng.randint(1, 4)
+    elif mode == 'long':
+        words = rng.randint(25, 60)
+    else:
+        words = rng.choice([rng.randint(1, 4), rng.randint(8, 15), rng.randint(25, 60)])
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def make_po_data(item_count, mode, seed=0):
+    """Deterministic synthetic po_data with item_count lines"""
+    rng = random.Random(seed)
+    items = []
+    for _ in range(item_count):
+        quantity = rng.randint(1, 50)
+        unit_price = round(rng.uniform(1, 5000), 2)
+        items.append({
+            'item': make_description(rng, mode),
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'total': round(quantity * unit_price, 2),
+        })
+    subtotal = round(sum(item['total'] for item in items), 2)
+    return {
+        'company_name': 'Kovan Labs',
+        'company_address': 'GF44, Tidel park, Coimbatore, India - 641 014',
+        'company_phone': '8675955999',
+        'po_number': f'PO-BENCH-{item_count}-{mode}',
+        'order_date': '2024-01-01',
+        'due_date': '2024-01-03',
+        'bill_to_name': 'Acme Industrial Supplies',
+        'bill_to_address': '12 Industrial Estate, Chennai, India - 600 032',
+        'bill_to_phone': '9876543210',
+        'ship_to_name': 'Kovan Labs Warehouse',
+        'ship_to_address': 'Plot 7, SIDCO, Coimbatore, India - 641 021',
+        'ship_to_phone': '8675955999',
+        'items': items,
+        'subtotal': subtotal,
+        'total': subtotal,
+        'notes': NOTES,
+        'terms': TERMS,
+    }
+
+
+def render_once(generator, po_data):
+    """Render po_data, returning (story seconds, build seconds, pages, bytes)"""
+    buffer = io.BytesIO()
+    start = time.perf_counter()
+    doc = generator.make_doc(buffer)
+    story = generator.build_story(po_data)
+    story_done = time.perf_counter()
+    doc.build(story)
+    build_done = time.perf_counter()
+    return story_done - start, build_done - story_done, doc.page, buffer.tell()
+
+
+def peak_memory(generator, po_data):
+    """Peak traced allocation in bytes for a single render"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        render_once(generator, po_data)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(generator, item_count, mode, repeat, measure_memory):
+    po_data = make_po_data(item_count, mode)
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        story_s, build_s, pages, size = render_once(generator, po_data)
+        if best is None or story_s + build_s < best[0] + best[1]:
+            best = (story_s, build_s, pages, size)
+    story_s, build_s, pages, size = best
+    return {
+        'items': item_count,
+        'descriptions': mode,
+        'story_ms': round(story_s * 1000, 2),
+        'build_ms': round(build_s * 1000, 2),
+        'total_ms': round((story_s + build_s) * 1000, 2),
+        'peak_mb': round(peak_memory(generator, po_data) / 2**20, 2) if measure_memory else None,
+        'pages': pages,
+        'bytes': size,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r['items'], r['descriptions']): r for r in json.load(f)['results']}
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        before = baseline.get((result['items'], result['descriptions']))
+        if before is None or not before['total_ms']:
+            continue
+        ratio = result['total_ms'] / before['total_ms']
+        print(f"{result['items']:>6} {result['descriptions']:<6} "
+              f"{before['total_ms']:>10.1f} -> {result['total_ms']:>10.1f} ms  ({ratio:.2f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark purchase order PDF rendering")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Line item counts")
+    parser.add_argument('--descriptions', nargs='+', choices=DESCRIPTION_MODES, default=DESCRIPTION_MODES,
+                        help="Description length modes")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case; the fastest is reported")
+    parser.add_argument('--template', action='store_true',
+                        help="Render in template mode (cached letterhead form)")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced peak memory pass")
+    parser.add_argument('--json', dest='json_path', help="Write results as JSON to this file")
+    parser.add_argument('--compare', help="Previous JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    prewarm()
+    generator = PurchaseOrderPDF(template_mode=args.template)
+
+    print(f"{'items':>6} {'desc':<6} {'story ms':>10} {'build ms':>10} {'total ms':>10} "
+          f"{'peak MB':>8} {'pages':>6} {'bytes':>11}")
+    results = []
+    for item_count in args.sizes:
+        for mode in args.descriptions:
+            # Large cases are slow; one timed run is enough to see the trend
+            repeat = args.repeat if item_count <= 1000 else 1
+            result = run_case(generator, item_count, mode, repeat, not args.no_memory)
+            results.append(result)
+            peak = f"{result['peak_mb']:.1f}" if result['peak_mb'] is not None else '-'
+            print(f"{result['items']:>6} {mode:<6} {result['story_ms']:>10.1f} {result['build_ms']:>10.1f} "
+                  f"{result['total_ms']:>10.1f} {peak:>8} {result['pages']:>6} {result['bytes']:>11,}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'template_mode': args.template,
+                'results': results,
+            }, f, indent=2)
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Cold-start import benchmark.
+
+Imports each entry-point module in a fresh interpreter under
+`python -X importtime` and reports its cumulative import time. Exits with
+status 1 if a module pulls in a dependency that should only load on first
+use (pandas, ReportLab, svglib) or goes over its time budget, so it can
+guard against startup regressions in CI.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 5 --json startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> (time budget in ms, modules that must not be imported eagerly)
+BUDGETS = {
+    'pdf_generator': (50, ['reportlab', 'svglib']),
+    'pdf_cache': (50, ['reportlab', 'svglib']),
+    'batch': (100, ['reportlab', 'svglib', 'pandas']),
+    'service': (500, ['reportlab', 'svglib', 'pandas']),
+    'app': (1500, ['reportlab', 'svglib', 'pandas']),
+}
+
+
+def import_profile(module):
+    """Import module in a fresh interpreter; return {imported module: cumulative us}"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def measure(module, runs):
+    """Best-of-runs cumulative import time in ms, plus the set of imported modules"""
+    best = None
+    imported = set()
+    for _ in range(runs):
+        profile = import_profile(module)
+        imported = set(profile)
+        elapsed = profile[module] / 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark cold-start import time")
+    parser.add_argument('modules', nargs='*', default=list(BUDGETS), help="Modules to import")
+    parser.add_argument('--runs', type=int, default=3, help="Runs per module; the best is reported")
+    parser.add_argument('--json', dest='json_path', help="Write results as JSON to this file")
+    parser.add_argument('--no-budget', action='store_true', help="Report times without enforcing budgets")
+    args = parser.parse_args(argv)
+
+    results = []
+    failed = False
+    for module in args.modules:
+        budget_ms, forbidden = BUDGETS.get(module, (None, []))
+        elapsed_ms, imported = measure(module, args.runs)
+        eager = sorted(name for name in forbidden
+                       if any(m == name or m.startswith(name + '.') for m in imported))
+        over_budget = budget_ms is not None and not args.no_budget and elapsed_ms > budget_ms
+        ok = not eager and not over_budget
+        failed = failed or not ok
+
+        results.append({'module': module, 'import_ms': round(elapsed_ms, 1),
+                        'budget_ms': budget_ms, 'eager_imports': eager, 'ok': ok})
+        budget = f"/ {budget_ms} ms budget" if budget_ms is not None else ""
+        status = 'ok' if ok else 'FAIL'
+        print(f"{module:<15} {elapsed_ms:8.1f} ms {budget:<16} {status}"
+              + (f"  eager: {', '.join(eager)}" if eager else ""))
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Product catalog with SKU lookup and fuzzy search.
+
+The catalog (SKU, description, unit price) is imported from CSV and
+compiled into a compact pickle next to the source file: columnar arrays
+plus a sorted SKU list and a trigram index of the descriptions. Later
+loads read the compiled file instead of re-parsing the CSV, and it is
+rebuilt whenever the CSV is newer. SKU prefixes are found with bisect and
+descriptions are scored only from the posting lists of the query's
+trigrams, so typing into the search box never scans the whole catalog.
+The catalog is a lazily loaded process-wide singleton shared by all
+sessions.
+"""
+import csv
+import os
+import pickle
+import threading
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from csv_import import read_csv_records
+
+CatalogItem = namedtuple('CatalogItem', ['sku', 'description', 'unit_price'])
+
+# Override the catalog file with PO_CATALOG_PATH
+CATALOG_PATH_ENV = 'PO_CATALOG_PATH'
+DEFAULT_CATALOG_PATH = 'catalog.csv'
+COMPILED_SUFFIX = '.idx'
+# Bump when the compiled layout changes so old files are rebuilt
+COMPILED_VERSION = 1
+
+# Accepted spellings for each column in imported files (see csv_import.py)
+CATALOG_COLUMN_ALIASES = {
+    'sku': ['sku', 'item code', 'code', 'part number', 'part no'],
+    'description': ['description', 'item', 'item description', 'name'],
+    'unit_price': ['unit_price', 'unit price', 'price', 'rate'],
+}
+
+_default_catalog_lock = threading.Lock()
+_default_catalog = None
+
+
+class CatalogImportError(ValueError):
+    """Raised when a catalog file is missing required columns"""
+
+
+def _trigrams(text, partial_last=False):
+    """Trigrams of each word padded as '  word ', so short prefixes still match.
+
+    With partial_last the final word is treated as a prefix still being typed.
+    """
+    words = text.casefold().split()
+    grams = []
+    for position, word in enumerate(words):
+        padded = f"  {word}" if partial_last and position == len(words) - 1 else f"  {word} "
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def read_catalog(source):
+    """Read catalog items from a CSV path or binary file object.
+
+    Returns (items, skipped) where skipped lists the 1-based data row
+    numbers without a SKU or description, or with an invalid price.
+    """
+    items = []
+    skipped = []
+    for row_number, fields in read_csv_records(source, CATALOG_COLUMN_ALIASES, CatalogImportError):
+        try:
+            unit_price = float(fields['unit_price'].replace(',', ''))
+        except ValueError:
+            unit_price = 0.0
+        if not fields['sku'] or not fields['description'] or unit_price <= 0:
+            skipped.append(row_number)
+            continue
+        items.append(CatalogItem(fields['sku'], fields['description'], unit_price))
+    return items, skipped
+
+
+class Catalog:
+    def __init__(self, items=()):
+        # Columnar storage; a later row with the same SKU replaces the earlier one
+        by_sku = {}
+        for item in items:
+            by_sku[item.sku.casefold()] = item
+        self.skus = [item.sku for item in by_sku.values()]
+        self.descriptions = [item.description for item in by_sku.values()]
+        self.prices = array('d', (item.unit_price for item in by_sku.values()))
+        self._positions = {sku: position for position, sku in enumerate(by_sku)}
+        self._sorted_skus = sorted(by_sku)
+        self._build_index()
+
+    def _build_index(self):
+        postings = {}
+        gram_counts = array('H')
+        for position, description in enumerate(self.descriptions):
+            grams = set(_trigrams(description))
+            gram_counts.append(min(len(grams), 0xFFFF))
+            for gram in grams:
+                postings.setdefault(gram, array('I')).append(position)
+        self._postings = postings
+        self._gram_counts = gram_counts
+
+    def __len__(self):
+        return len(self.skus)
+
+    def item(self, position):
+        return CatalogItem(self.skus[position], self.descriptions[position], self.prices[position])
+
+    def get(self, sku):
+        """Exact SKU lookup, ignoring case"""
+        position = self._positions.get(sku.strip().casefold())
+        return None if position is None else self.item(position)
+
+    def search(self, query, limit=10):
+        """Best matches for query: SKUs starting with it first, then descriptions by trigram similarity"""
+        import numpy as np
+
+        key = query.strip().casefold()
+        results = []
+        if key:
+            start = bisect_left(self._sorted_skus, key)
+            for sku in self._sorted_skus[start:start + limit]:
+                if not sku.startswith(key):
+                    break
+                results.append(self._positions[sku])
+
+        query_grams = set(_trigrams(query, partial_last=True))
+        postings = [self._postings[gram] for gram in query_grams if gram in self._postings]
+        if postings and len(results) < limit:
+            # Count shared trigrams for the entries in the query's posting lists only
+            candidates = np.concatenate([np.frombuffer(p, dtype=np.uint32) for p in postings])
+            matched, shared = np.unique(candidates, return_counts=True)
+            # Dice coefficient between the query and description trigram sets
+            gram_counts = np.frombuffer(self._gram_counts, dtype=np.uint16)[matched]
+            scores = 2 * shared / (len(query_grams) + gram_counts)
+            count = min(limit + len(results), len(matched))
+            best = np.argpartition(-scores, count - 1)[:count]
+            best = best[np.lexsort((matched[best], -scores[best]))]
+            seen = set(results)
+            results.extend(position for position in matched[best].tolist() if position not in seen)
+        return [self.item(position) for position in results[:limit]]
+
+    def save(self, path):
+        """Write the compiled catalog to path, replacing the file atomically"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((COMPILED_VERSION, self.__dict__), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a compiled catalog; returns None if it was written by another version"""
+        with open(path, 'rb') as f:
+            version, state = pickle.load(f)
+        if version != COMPILED_VERSION:
+            return None
+        catalog = cls.__new__(cls)
+        catalog.__dict__.update(state)
+        return catalog
+
+    def write_csv(self, path):
+        """Write the catalog source CSV, replacing the file atomically"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CatalogItem._fields)
+            writer.writerows(zip(self.skus, self.descriptions, self.prices))
+        os.replace(tmp_path, path)
+
+
+def catalog_path():
+    return os.environ.get(CATALOG_PATH_ENV) or DEFAULT_CATALOG_PATH
+
+
+def load_catalog(path):
+    """Load the catalog at path from its compiled file, compiling it first if stale"""
+    compiled_path = path + COMPILED_SUFFIX
+    if not os.path.exists(path):
+        return Catalog()
+    if os.path.exists(compiled_path) and os.stat(compiled_path).st_mtime_ns >= os.stat(path).st_mtime_ns:
+        catalog = Catalog.load(compiled_path)
+        if catalog is not None:
+            return catalog
+    catalog = Catalog(read_catalog(path)[0])
+    catalog.save(compiled_path)
+    return catalog
+
+
+def get_catalog():
+    """Return the process-wide catalog, loading it on first use"""
+    global _default_catalog
+    if _default_catalog is None:
+        with _default_catalog_lock:
+            if _default_catalog is None:
+                _default_catalog = load_catalog(catalog_path())
+    return _default_catalog
+
+
+def import_catalog(source):
+    """Replace the shared catalog with the items in an uploaded CSV.
+
+    The CSV and its compiled index are written to the catalog path so other
+    processes and restarts pick them up. Returns (catalog, skipped rows).
+    """
+    global _default_catalog
+    items, skipped = read_catalog(source)
+    catalog = Catalog(items)
+    path = catalog_path()
+    with _default_catalog_lock:
+        catalog.write_csv(path)
+        catalog.save(path + COMPILED_SUFFIX)
+        _default_catalog = catalog
+    return catalog, skipped
@@ -0,0 +1,59 @@
+"""Column matching and CSV reading shared by the bulk imports.
+
+Line item, vendor and catalog files come from spreadsheets and ERP exports
+that name their columns in different ways, so each import lists the
+accepted spellings of its fields and resolve_columns() finds them in the
+header. read_csv_records() reads a whole CSV with the standard library for
+the imports that do not need pandas (vendors and the catalog), so they stay
+cheap to import.
+"""
+import csv
+import io
+import os
+
+
+def resolve_columns(header, aliases, error, optional=()):
+    """Map each field in aliases to the position of its column in header.
+
+    aliases maps field -> accepted column names (compared stripped and
+    lower-cased), the first one present wins. A field without a column
+    raises error, an exception class, naming the accepted spellings; fields
+    listed in optional map to None instead.
+    """
+    normalized = {str(column).strip().lower(): position for position, column in enumerate(header)}
+    positions = {}
+    for field, names in aliases.items():
+        positions[field] = next((normalized[name] for name in names if name in normalized), None)
+        if positions[field] is None and field not in optional:
+            raise error(f"Missing column for '{field}' (accepted names: {', '.join(names)})")
+    return positions
+
+
+def open_csv(source):
+    """Text file for a CSV path or binary file object (such as a Streamlit upload), skipping any BOM"""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, newline='', encoding='utf-8-sig')
+    return io.TextIOWrapper(source, newline='', encoding='utf-8-sig')
+
+
+def read_csv_records(source, aliases, error, optional=()):
+    """Yield (row number, fields) for each non-blank data row of a CSV path or binary file object.
+
+    Columns are found as in resolve_columns. fields maps every field in
+    aliases to its stripped text, '' when the row is too short or an
+    optional column is missing. Row numbers count data rows from 1. A file
+    without a header row yields nothing.
+    """
+    with open_csv(source) as f:
+        rows = csv.reader(f)
+        header = next(rows, None)
+        if header is None:
+            return
+        positions = resolve_columns(header, aliases, error, optional)
+        for row_number, row in enumerate(rows, start=1):
+            if not any(value.strip() for value in row):
+                continue
+            yield row_number, {
+                field: row[position].strip() if position is not None and position < len(row) else ''
+                for field, position in positions.items()
+            }
@@ -0,0 +1,173 @@
+"""Pre-rendered letterhead for template mode.
+
+The top of every purchase order (logo, "PURCHASE ORDER" title and the
+company details) only changes with the company. In template mode it is
+drawn into a PDF form XObject, and the form's drawing operations are
+cached per company, so later documents define the form from the cached
+operations instead of laying out the logo and tables again. The PO number
+and dates are drawn on top of the form at the positions recorded when the
+template was captured, so the page looks exactly like the normal layout.
+
+Imported on first use by PurchaseOrderPDF(template_mode=True); it pulls in
+ReportLab at import time.
+"""
+import hashlib
+import os
+import threading
+from collections import namedtuple
+from reportlab.platypus import Flowable, Spacer
+
+# Templates kept per process; older companies are dropped first
+MAX_TEMPLATES = 64
+
+# Where a variable paragraph sits within the letterhead: offset from the
+# letterhead origin plus the size it was laid out at
+SlotPosition = namedtuple('SlotPosition', ['x', 'y', 'width', 'height'])
+
+# code/fonts are None when the form used resources that cannot be replayed
+# into another document
+LetterheadTemplate = namedtuple('LetterheadTemplate', ['height', 'slots', 'code', 'fonts'])
+
+_templates_lock = threading.Lock()
+_templates = {}
+
+
+class Slot(Flowable):
+    """Takes the place of a variable paragraph while the letterhead is captured.
+
+    Sized exactly like the paragraph, draws nothing, and records where the
+    paragraph would have been drawn relative to the form's origin.
+    """
+
+    def __init__(self, paragraph):
+        super().__init__()
+        self.paragraph = paragraph
+        self.position = None
+
+    def wrap(self, availWidth, availHeight):
+        self.avail_width = availWidth
+        self.width, self.height = self.paragraph.wrap(availWidth, availHeight)
+        return self.width, self.height
+
+    def getSpaceBefore(self):
+        return self.paragraph.getSpaceBefore()
+
+    def getSpaceAfter(self):
+        return self.paragraph.getSpaceAfter()
+
+    def draw(self):
+        matrix = self.canv._currentMatrix
+        self.position = SlotPosition(matrix[4], matrix[5], self.avail_width, self.height)
+
+
+class Letterhead(Flowable):
+    """Header table, spacer and company table drawn through a cached form XObject"""
+
+    def __init__(self, pdf, po_data):
+        super().__init__()
+        self.pdf = pdf
+        self.po_data = po_data
+        self.paragraphs = pdf.header_slot_paragraphs(po_data)
+        try:
+            logo_mtime = os.stat(pdf.logo_path).st_mtime_ns
+        except OSError:
+            logo_mtime = 0
+        self.static_key = (pdf.logo_path, logo_mtime, po_data['company_name'],
+                           po_data['company_address'], po_data['company_phone'])
+        self.template = None
+        self.cacheable = False
+        self.flowables = None
+
+    def _build(self, availWidth, availHeight):
+        """Lay out the static flowables with slots standing in for the variable paragraphs"""
+        self.slots = [Slot(paragraph) for paragraph in self.paragraphs]
+        self.flowables = [self.pdf.build_header_table(self.pdf.create_logo(), self.slots),
+                          Spacer(1, 20),
+                          self.pdf.build_company_table(self.po_data)]
+        self.sizes = [flowable.wrap(availWidth, availHeight) for flowable in self.flowables]
+        return sum(height for _, height in self.sizes)
+
+    def wrap(self, availWidth, availHeight):
+        self.key = self.static_key + (availWidth,)
+        with _templates_lock:
+            template = _templates.get(self.key)
+        heights = None
+        if template is not None:
+            heights = [paragraph.wrap(slot.width, availHeight)[1]
+                       for paragraph, slot in zip(self.paragraphs, template.slots)]
+        if heights is not None and heights == [slot.height for slot in template.slots]:
+            self.template = template
+            self.height = template.height
+        else:
+            # First use for this company, or a PO number or date long enough
+            # to wrap, which changes the layout; only the former is cached
+            self.cacheable = template is None
+            self.template = None
+            self.height = self._build(availWidth, availHeight)
+            heights = [slot.height for slot in self.slots]
+        self.form_key = self.key + tuple(heights)
+        self.width = availWidth
+        return self.width, self.height
+
+    def _replay(self, canv, name):
+        """Define the form from the cached operations; False if this document cannot reuse them"""
+        template = self.template
+        if template is None or template.code is None:
+            return False
+        if [canv._doc.getInternalFontName(font) for font, _ in template.fonts] != \
+                [internal for _, internal in template.fonts]:
+            return False
+        canv.beginForm(name)
+        canv._code.extend(template.code)
+        canv.endForm()
+        return True
+
+    def _capture(self, canv, name):
+        """Draw the static flowables into the form, returning the template that reproduces it"""
+        if self.flowables is None:
+            self._build(self.width, self.height)
+        canv.beginForm(name)
+        y = self.height
+        for flowable, (width, height) in zip(self.flowables, self.sizes):
+            y -= height
+            flowable.drawOn(canv, 0, y, _sW=self.width - width)
+        code = list(canv._code)
+        replayable = not (canv._colorsUsed or canv._shadingUsed or canv._formsinuse
+                          or canv._annotationrefs)
+        canv.endForm()
+
+        text = '\n'.join(code)
+        # Graphics states and images are document resources that cached code cannot carry
+        if ' gs' in text or ' Do' in text:
+            replayable = False
+        fonts = [(font, internal) for font, internal in canv._doc.fontMapping.items()
+                 if f"{internal} " in text]
+        template = LetterheadTemplate(self.height, [slot.position for slot in self.slots],
+                                      code if replayable else None, fonts if replayable else None)
+        if self.cacheable:
+            with _templates_lock:
+                if len(_templates) >= MAX_TEMPLATES:
+                    _templates.pop(next(iter(_templates)))
+                _templates[self.key] = template
+        return template
+
+    def draw(self):
+        canv = self.canv
+        digest = hashlib.sha1(repr(self.form_key).encode('utf-8')).hexdigest()[:16]
+        name = f"Letterhead{digest}"
+        # Forms already defined in this document, e.g. several POs merged into one file
+        defined = canv.__dict__.setdefault('_po_letterheads', {})
+        template = defined.get(name)
+        if template is None:
+            template = self.template if self._replay(canv, name) else self._capture(canv, name)
+            defined[name] = template
+        canv.doForm(name)
+        for paragraph, slot in zip(self.paragraphs, template.slots):
+            paragraph.wrap(slot.width, slot.height)
+            paragraph.drawOn(canv, slot.x, slot.y)
+
+
+def clear_templates():
+    """Forget all cached letterheads, for example after changing the company details layout"""
+    with _templates_lock:
+        _templates.clear()
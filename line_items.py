@@ -0,0 +1,159 @@
+"""Columnar line item storage and bulk import.
+
+Line items are kept as a pandas DataFrame with the columns in ITEM_COLUMNS
+rather than a list of dicts, so validation and totals are computed a column
+at a time. CSV and XLSX exports are read in chunks to keep memory bounded
+on very large files.
+"""
+import os
+import numpy as np
+import pandas as pd
+from csv_import import resolve_columns
+
+ITEM_COLUMNS = ['item', 'quantity', 'unit_price', 'total']
+
+# Accepted spellings for each column in imported files (see csv_import.py)
+COLUMN_ALIASES = {
+    'item': ['item', 'description', 'item description', 'name'],
+    'quantity': ['quantity', 'qty'],
+    'unit_price': ['unit_price', 'unit price', 'price', 'rate'],
+}
+
+DEFAULT_CHUNKSIZE = 10_000
+
+
+class LineItemImportError(ValueError):
+    """Raised when an import file is missing required columns"""
+
+
+def empty_items():
+    """Return an empty line item DataFrame with the expected dtypes"""
+    return pd.DataFrame({
+        'item': pd.Series(dtype='object'),
+        'quantity': pd.Series(dtype='int64'),
+        'unit_price': pd.Series(dtype='float64'),
+        'total': pd.Series(dtype='float64'),
+    })
+
+
+def append_items(items, new_items):
+    """Return items with new_items appended and a fresh 0..n-1 index"""
+    if items.empty:
+        return new_items.reset_index(drop=True)
+    if new_items.empty:
+        return items
+    return pd.concat([items, new_items], ignore_index=True)
+
+
+def make_item(description, quantity, unit_price):
+    """Build a single-row line item DataFrame"""
+    return pd.DataFrame({
+        'item': [description],
+        'quantity': [quantity],
+        'unit_price': [float(unit_price)],
+        'total': [quantity * float(unit_price)],
+    })
+
+
+def _resolve_columns(columns):
+    """Map the columns of an import file onto item, quantity and unit_price"""
+    columns = list(columns)
+    positions = resolve_columns(columns, COLUMN_ALIASES, LineItemImportError)
+    return {columns[position]: field for field, position in positions.items()}
+
+
+def validate_chunk(chunk, first_row=1):
+    """Validate and total one chunk of raw rows.
+
+    Returns (items, errors): items holds the valid rows in ITEM_COLUMNS
+    order with totals filled in, errors holds the rejected rows with their
+    1-based data row number and a reason.
+    """
+    chunk = chunk.rename(columns=_resolve_columns(chunk.columns))
+    rows = np.arange(first_row, first_row + len(chunk))
+
+    description = chunk['item'].astype('string').str.strip()
+    quantity = pd.to_numeric(chunk['quantity'], errors='coerce')
+    unit_price = pd.to_numeric(chunk['unit_price'], errors='coerce')
+
+    bad_description = description.isna() | (description == '')
+    bad_quantity = quantity.isna() | (quantity <= 0)
+    bad_price = unit_price.isna() | (unit_price <= 0)
+    invalid = (bad_description | bad_quantity | bad_price).to_numpy()
+
+    reason = np.select(
+        [bad_description.to_numpy(), bad_quantity.to_numpy(), bad_price.to_numpy()],
+        ['missing description', 'invalid quantity', 'invalid unit price'],
+        default=''
+    )
+    errors = pd.DataFrame({'row': rows[invalid], 'reason': reason[invalid]})
+
+    valid = ~invalid
+    items = pd.DataFrame({
+        'item': description[valid].astype(object).to_numpy(),
+        'quantity': quantity[valid].to_numpy(),
+        'unit_price': unit_price[valid].astype('float64').to_numpy(),
+    })
+    # Whole-number quantities stay integers so they print as "3" rather than "3.0"
+    if (items['quantity'] % 1 == 0).all():
+        items['quantity'] = items['quantity'].astype('int64')
+    items['total'] = items['quantity'] * items['unit_price']
+    return items, errors
+
+
+def _iter_csv_chunks(source, chunksize):
+    yield from pd.read_csv(source, chunksize=chunksize, dtype=str, skip_blank_lines=True)
+
+
+def _iter_xlsx_chunks(source, chunksize):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        batch = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def read_line_items(source, chunksize=DEFAULT_CHUNKSIZE, file_name=None):
+    """Read line items from a CSV or XLSX file in chunks.
+
+    source may be a path or a binary file object (such as a Streamlit
+    upload); file_name is used to pick the format when source has no name.
+    Returns (items, errors) as described in validate_chunk.
+    """
+    name = file_name or getattr(source, 'name', None) or str(source)
+    extension = os.path.splitext(name)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        chunks = _iter_xlsx_chunks(source, chunksize)
+    elif extension in ('.csv', '.txt', ''):
+        chunks = _iter_csv_chunks(source, chunksize)
+    else:
+        raise LineItemImportError(f"Unsupported file type: {extension}")
+
+    item_chunks = []
+    error_chunks = []
+    first_row = 1
+    for chunk in chunks:
+        items, errors = validate_chunk(chunk, first_row)
+        item_chunks.append(items)
+        error_chunks.append(errors)
+        first_row += len(chunk)
+
+    items = pd.concat(item_chunks, ignore_index=True) if item_chunks else empty_items()
+    errors = (pd.concat(error_chunks, ignore_index=True) if error_chunks
+              else pd.DataFrame({'row': pd.Series(dtype='int64'), 'reason': pd.Series(dtype='object')}))
+    return items[ITEM_COLUMNS], errors
@@ -0,0 +1,105 @@
+"""Prometheus text-format metrics for PDF rendering.
+
+RenderMetrics aggregates RenderProfile results (see
+PurchaseOrderPDF(profile_hook=...)) into counters and per-stage latency
+histograms, and renders them in the Prometheus text exposition format.
+The service serves them at /metrics and batch.py can write them to a file
+for the node exporter's textfile collector.
+"""
+import threading
+from bisect import bisect_left
+
+# Upper bounds in seconds; the +Inf bucket is implicit
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels=''):
+        """Exposition lines with cumulative bucket counts"""
+        separator = ',' if labels else ''
+        cumulative = 0
+        lines = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{name}_bucket{{{labels}{separator}le="{le}"}} {cumulative}')
+        suffix = f'{{{labels}}}' if labels else ''
+        lines.append(f'{name}_sum{suffix} {self.sum!r}')
+        lines.append(f'{name}_count{suffix} {self.count}')
+        return lines
+
+
+class RenderMetrics:
+    """Thread-safe aggregate of rendered documents"""
+
+    def __init__(self, prefix='po_pdf'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.documents = {'hit': 0, 'miss': 0}
+        self.items = 0
+        self.pages = 0
+        self.bytes = 0
+        self.render_seconds = Histogram()
+        self.stage_seconds = {}
+
+    def observe(self, profile=None, cached=False):
+        """Count one document; profile is a RenderProfile or its to_dict(), None for cache hits"""
+        if profile is not None and not isinstance(profile, dict):
+            profile = profile.to_dict()
+        with self._lock:
+            self.documents['hit' if cached else 'miss'] += 1
+            if profile is None:
+                return
+            self.items += profile['items']
+            self.pages += profile['pages']
+            self.bytes += profile['bytes']
+            self.render_seconds.observe(profile['seconds'])
+            for stage, seconds in profile['stages'].items():
+                histogram = self.stage_seconds.get(stage)
+                if histogram is None:
+                    histogram = self.stage_seconds[stage] = Histogram()
+                histogram.observe(seconds)
+
+    def render_text(self, extra=None):
+        """The metrics in Prometheus text exposition format.
+
+        extra maps metric name (without prefix) to (type, help, value), for
+        process state such as in-flight requests.
+        """
+        p = self.prefix
+        with self._lock:
+            lines = [
+                f'# HELP {p}_documents_total Purchase order PDFs served, by cache result.',
+                f'# TYPE {p}_documents_total counter',
+            ]
+            lines += [f'{p}_documents_total{{cache="{result}"}} {count}'
+                      for result, count in self.documents.items()]
+            for name, help_text, value in [
+                ('items_total', 'Line items rendered.', self.items),
+                ('pages_total', 'Pages rendered.', self.pages),
+                ('bytes_total', 'PDF bytes rendered.', self.bytes),
+            ]:
+                lines += [f'# HELP {p}_{name} {help_text}', f'# TYPE {p}_{name} counter', f'{p}_{name} {value}']
+
+            lines += [f'# HELP {p}_render_seconds Time to render one PDF.',
+                      f'# TYPE {p}_render_seconds histogram']
+            lines += self.render_seconds.lines(f'{p}_render_seconds')
+            lines += [f'# HELP {p}_stage_seconds Time spent in each render stage.',
+                      f'# TYPE {p}_stage_seconds histogram']
+            for stage, histogram in self.stage_seconds.items():
+                lines += histogram.lines(f'{p}_stage_seconds', f'stage="{stage}"')
+
+        for name, (metric_type, help_text, value) in (extra or {}).items():
+            lines += [f'# HELP {p}_{name} {help_text}', f'# TYPE {p}_{name} {metric_type}', f'{p}_{name} {value}']
+        return '\n'.join(lines) + '\n'
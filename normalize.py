@@ -0,0 +1,173 @@
+"""Validation and normalization of po_data before layout.
+
+User text ends up in ReportLab Paragraph markup, where a stray "<" or "&"
+breaks the render and newlines are ignored. normalize_po_data() runs once
+over a whole purchase order before the story is built: it escapes markup
+characters and turns newlines into <br/> with one precompiled translation
+table, coerces amounts and quantities to int or Decimal (whether they came
+as JSON numbers or strings) and dates to ISO format, and reports every
+problem at once as a PODataError instead of failing halfway through the
+layout.
+"""
+import math
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+# Header fields every purchase order needs; the rest are optional
+REQUIRED_TEXT_FIELDS = [
+    'company_name', 'company_address', 'company_phone',
+    'bill_to_name', 'bill_to_address', 'bill_to_phone',
+    'ship_to_name', 'ship_to_address', 'ship_to_phone',
+]
+OPTIONAL_TEXT_FIELDS = ['notes', 'terms']
+DATE_FIELDS = ['order_date', 'due_date']
+REQUIRED_AMOUNT_FIELDS = ['subtotal', 'total']
+OPTIONAL_AMOUNT_FIELDS = ['discount', 'tax_rate', 'tax']
+REQUIRED_ITEM_FIELDS = ['item', 'quantity', 'unit_price', 'total']
+ITEM_NUMBER_FIELDS = ['quantity', 'unit_price', 'total']
+
+# Built once; str.translate applies it in a single pass over each field
+MARKUP_ESCAPES = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '\r': None,
+    '\n': '<br/>',
+})
+
+
+class PODataError(ValueError):
+    """Raised when po_data cannot be laid out; problems lists every field at fault"""
+
+    def __init__(self, problems):
+        super().__init__(f"Invalid purchase order: {'; '.join(problems)}")
+        self.problems = problems
+
+
+def escape_markup(text):
+    """Text as Paragraph markup: markup characters escaped, newlines as line breaks"""
+    return str(text).translate(MARKUP_ESCAPES)
+
+
+def to_number(value):
+    """int or Decimal for a number or numeric string; ValueError otherwise.
+
+    Floats become the Decimal of their shortest repr, so amounts from JSON
+    numbers and numeric strings can be added together.
+    """
+    if type(value) is int:
+        return value  # The common case, from the form and JSON input
+    if type(value) is float and math.isfinite(value):
+        return Decimal(repr(value))
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        value = value.item()  # numpy scalars from DataFrame records
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, str):
+        text = value.strip().replace(',', '')
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            value = Decimal(text)
+        except InvalidOperation:
+            raise ValueError from None
+    if isinstance(value, Decimal):
+        if not value.is_finite():
+            raise ValueError
+        return value
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and math.isfinite(value):
+        return Decimal(repr(float(value)))
+    raise ValueError
+
+
+def format_percent(rate):
+    """A rate such as 0.125 as percent text without trailing zeros ("12.5"), shared by the form and the PDF"""
+    return f"{(Decimal(str(rate)) * 100).normalize():f}"
+
+
+def to_iso_date(value):
+    """YYYY-MM-DD for a date, datetime or ISO date string; ValueError otherwise"""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str):
+        return date.fromisoformat(value.strip()).isoformat()
+    raise ValueError
+
+
+def normalize_po_data(po_data, require_po_number=True):
+    """Return a copy of po_data ready for layout, or raise PODataError listing every problem.
+
+    Text fields come back as escaped Paragraph markup, amounts as int or Decimal
+    and dates as YYYY-MM-DD. Fields the layout does not read are copied
+    unchanged. require_po_number=False accepts orders still waiting for a
+    number (batch input).
+    """
+    if not isinstance(po_data, dict):
+        raise PODataError(["Purchase order must be a JSON object"])
+    problems = []
+    normalized = dict(po_data)
+
+    text_fields = REQUIRED_TEXT_FIELDS + (['po_number'] if require_po_number else [])
+    for field in text_fields:
+        if po_data.get(field) is None:
+            problems.append(f"Missing field: {field}")
+        else:
+            normalized[field] = escape_markup(po_data[field])
+    if not require_po_number:
+        normalized['po_number'] = escape_markup(po_data.get('po_number') or '')
+    for field in OPTIONAL_TEXT_FIELDS:
+        normalized[field] = escape_markup(po_data[field]) if po_data.get(field) else ''
+
+    for field in DATE_FIELDS:
+        value = po_data.get(field)
+        if value is None:
+            problems.append(f"Missing field: {field}")
+            continue
+        try:
+            normalized[field] = to_iso_date(value)
+        except ValueError:
+            problems.append(f"{field}: {value!r} is not a date (YYYY-MM-DD)")
+
+    for field in REQUIRED_AMOUNT_FIELDS + OPTIONAL_AMOUNT_FIELDS:
+        value = po_data.get(field)
+        if value is None or value == '':
+            if field in REQUIRED_AMOUNT_FIELDS:
+                problems.append(f"Missing field: {field}")
+            continue
+        try:
+            normalized[field] = to_number(value)
+        except ValueError:
+            problems.append(f"{field}: {value!r} is not a number")
+
+    items = po_data.get('items')
+    if not isinstance(items, list) or not items:
+        problems.append("items must be a non-empty list" if 'items' in po_data else "Missing field: items")
+        items = []
+    normalized_items = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            problems.append(f"items[{index}] must be an object")
+            continue
+        missing = [field for field in REQUIRED_ITEM_FIELDS if item.get(field) is None]
+        if missing:
+            problems.append(f"items[{index}] missing: {', '.join(missing)}")
+            continue
+        row = dict(item)
+        row['item'] = escape_markup(item['item'])
+        for field in ITEM_NUMBER_FIELDS:
+            try:
+                row[field] = to_number(item[field])
+            except ValueError:
+                problems.append(f"items[{index}].{field}: {item[field]!r} is not a number")
+        normalized_items.append(row)
+    normalized['items'] = normalized_items
+
+    if problems:
+        raise PODataError(problems)
+    return normalized
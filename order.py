@@ -0,0 +1,149 @@
+"""Purchase order model with running totals.
+
+PurchaseOrder owns the line item DataFrame and keeps the subtotal in step
+with every add, edit and removal, so neither the UI nor the PDF generator
+has to walk the items to total them. Amounts are tracked in integer minor
+currency units (paise for Rs.) and exposed as Decimal, which keeps totals
+exact and identical on screen and in the PDF.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+import numpy as np
+import pandas as pd
+from line_items import ITEM_COLUMNS, append_items, empty_items, make_item
+
+CURRENCY_QUANTUM = Decimal('0.01')
+
+
+class PurchaseOrder:
+    def __init__(self, tax_rate=0, discount=0, quantum=CURRENCY_QUANTUM):
+        self.quantum = Decimal(quantum)
+        self._places = -self.quantum.as_tuple().exponent
+        self._scale = 10 ** self._places
+        self._items = empty_items()
+        self._subtotal_minor = 0
+        self.tax_rate = Decimal(str(tax_rate))
+        self.discount = Decimal(str(discount))
+
+    @classmethod
+    def from_po_data(cls, po_data):
+        """Rebuild an order from po_data, for example a stored order being duplicated"""
+        order = cls(tax_rate=po_data.get('tax_rate') or 0, discount=po_data.get('discount') or 0)
+        if po_data['items']:
+            order.add_items(pd.DataFrame(po_data['items'], columns=['item', 'quantity', 'unit_price']))
+        return order
+
+    @property
+    def items(self):
+        """Line items as a DataFrame; treat as read-only and change it through the methods"""
+        return self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def empty(self):
+        return self._items.empty
+
+    def _line_minor(self, quantity, unit_price):
+        """Line totals in minor units, rounding the unit price to the currency first"""
+        price_minor = np.round(np.asarray(unit_price, dtype='float64') * self._scale)
+        return np.round(np.asarray(quantity, dtype='float64') * price_minor).astype('int64')
+
+    def _with_totals(self, items):
+        """Return items with the total column recomputed, plus the summed minor units"""
+        items = items.copy()
+        line_minor = self._line_minor(items['quantity'], items['unit_price'])
+        items['total'] = line_minor / self._scale
+        return items, int(line_minor.sum())
+
+    def add_items(self, new_items):
+        """Append a DataFrame of items (item, quantity, unit_price)"""
+        if new_items.empty:
+            return
+        new_items, added_minor = self._with_totals(new_items)
+        self._items = append_items(self._items, new_items[ITEM_COLUMNS])
+        self._subtotal_minor += added_minor
+
+    def add_item(self, description, quantity, unit_price):
+        """Append a single line item"""
+        self.add_items(make_item(description, quantity, unit_price))
+
+    def remove_items(self, positions):
+        """Remove the items at the given row positions"""
+        positions = list(positions)
+        if not positions:
+            return
+        removed = self._items.iloc[positions]
+        self._subtotal_minor -= int(self._line_minor(removed['quantity'], removed['unit_price']).sum())
+        self._items = self._items.drop(self._items.index[positions]).reset_index(drop=True)
+
+    def update_item(self, position, **values):
+        """Change the item, quantity and/or unit_price of the item at position"""
+        self.apply_editor_changes({'edited_rows': {position: values}})
+
+    def apply_editor_changes(self, changes):
+        """Apply the edits recorded by st.data_editor.
+
+        changes is the editor's session state value with edited_rows,
+        added_rows and deleted_rows keyed by row position. Only the touched
+        rows are re-totalled. Added rows are applied once they have a
+        description, quantity and unit price.
+        """
+        edited = {int(position): values for position, values in changes.get('edited_rows', {}).items()}
+        if edited:
+            positions = sorted(edited)
+            before = self._items.iloc[positions]
+            self._subtotal_minor -= int(self._line_minor(before['quantity'], before['unit_price']).sum())
+
+            items = self._items.copy()
+            for position, values in edited.items():
+                for column, value in values.items():
+                    if column in ('item', 'quantity', 'unit_price') and value is not None:
+                        items.iat[position, items.columns.get_loc(column)] = value
+
+            after = items.iloc[positions]
+            after_minor = self._line_minor(after['quantity'], after['unit_price'])
+            items.iloc[positions, items.columns.get_loc('total')] = after_minor / self._scale
+            self._subtotal_minor += int(after_minor.sum())
+            self._items = items
+
+        self.remove_items(changes.get('deleted_rows', []))
+
+        added = [row for row in changes.get('added_rows', [])
+                 if row.get('item') and row.get('quantity') and row.get('unit_price')]
+        if added:
+            self.add_items(pd.DataFrame(added, columns=['item', 'quantity', 'unit_price']))
+
+    def _round(self, amount):
+        return amount.quantize(self.quantum, rounding=ROUND_HALF_UP)
+
+    @property
+    def subtotal(self):
+        return Decimal(self._subtotal_minor).scaleb(-self._places)
+
+    @property
+    def discount_amount(self):
+        # Never discount below zero
+        return min(self._round(self.discount), self.subtotal)
+
+    @property
+    def tax(self):
+        return self._round((self.subtotal - self.discount_amount) * self.tax_rate)
+
+    @property
+    def total(self):
+        return self.subtotal - self.discount_amount + self.tax
+
+    def totals(self):
+        """Totals as the po_data fields read by the PDF generator"""
+        return {
+            'subtotal': self.subtotal,
+            'discount': self.discount_amount,
+            'tax_rate': self.tax_rate,
+            'tax': self.tax,
+            'total': self.total,
+        }
+
+    def to_po_items(self):
+        """Line items as the list of dicts expected in po_data['items']"""
+        return self._items.to_dict('records')
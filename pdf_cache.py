@@ -0,0 +1,292 @@
+"""Content-addressed cache of rendered purchase order PDFs.
+
+Rendered bytes are keyed by a SHA-256 of the normalized po_data together
+with the logo file's mtime, so an identical request returns the stored
+bytes without rebuilding the document. There is an in-process LRU memory
+tier and an optional on-disk tier that can be shared between processes;
+both evict least recently used entries once over their byte budget.
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from pdf_generator import LOGO_PATH, PurchaseOrderPDF, write_output
+
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_BYTES = 1024 * 1024 * 1024
+
+# Setting PO_PDF_CACHE_DIR enables the disk tier for the default cache
+CACHE_DIR_ENV = 'PO_PDF_CACHE_DIR'
+
+_default_cache_lock = threading.Lock()
+_default_cache = None
+
+
+def _normalize(value):
+    """Convert po_data values into a canonical JSON-serializable form"""
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, Decimal):
+        return {'decimal': str(value)}
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        # numpy scalars from DataFrame records
+        return value.item()
+    return value
+
+
+def cache_key(po_data, template_token=''):
+    """Stable hash of po_data; template_token identifies the template resources"""
+    payload = json.dumps(_normalize(po_data), sort_keys=True, separators=(',', ':'), default=str)
+    digest = hashlib.sha256()
+    digest.update(template_token.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(payload.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class PDFCache:
+    def __init__(self, max_memory_bytes=DEFAULT_MEMORY_BYTES, cache_dir=None,
+                 max_disk_bytes=DEFAULT_DISK_BYTES):
+        self.max_memory_bytes = max_memory_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> bytes, least recently used first
+        self._memory_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._disk_bytes = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def _disk_entries(self):
+        """(path, size, mtime) of every cached file on disk"""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.pdf'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue  # Evicted by another process
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _remember(self, key, data):
+        """Add data to the memory tier, evicting least recently used entries (lock held)"""
+        if len(data) > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def get(self, key, remember=True):
+        """Return the cached bytes for key, or None; remember=False keeps disk hits out of memory"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return data
+
+        if self.cache_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                os.utime(path)  # Mark as recently used for disk eviction
+            except FileNotFoundError:
+                data = None
+            if data is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    if remember:
+                        self._remember(key, data)
+                return data
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, data, remember=True):
+        """Store rendered bytes under key in every tier; remember=False skips the memory tier"""
+        if remember:
+            with self._lock:
+                self._remember(key, data)
+        self._store_disk(key, len(data), lambda f: f.write(data))
+
+    def put_file(self, key, path):
+        """Store a rendered PDF file under key in the disk tier, copying it without reading it into memory"""
+        def copy(f):
+            with open(path, 'rb') as src:
+                shutil.copyfileobj(src, f)
+
+        self._store_disk(key, os.path.getsize(path), copy)
+
+    def _store_disk(self, key, size, write):
+        """Add an entry of size bytes to the disk tier; write(f) fills the new file"""
+        if not self.cache_dir or size > self.max_disk_bytes:
+            return
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return  # Content addressed, so the stored bytes are identical
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._disk_bytes += size
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Delete least recently used files until the disk tier is within budget"""
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.cache_dir:
+            for path, _, _ in self._disk_entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            with self._lock:
+                self._disk_bytes = 0
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """Cache metrics as a flat dict"""
+        with self._lock:
+            return {
+                'hits': self.memory_hits + self.disk_hits,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': self.hit_rate,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_bytes': self._disk_bytes,
+            }
+
+
+def get_default_cache():
+    """Return the process-wide cache, creating it on first use"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = PDFCache(cache_dir=os.environ.get(CACHE_DIR_ENV) or None)
+    return _default_cache
+
+
+def _read_back(output):
+    """Bytes of a PDF just written to a file object, which stays positioned where it was; None if unseekable"""
+    if isinstance(output, io.BytesIO):
+        return output.getvalue()
+    if not output.seekable():
+        return None
+    start = output.tell()
+    data = output.read()
+    output.seek(start)
+    return data
+
+
+class CachedPurchaseOrderPDF(PurchaseOrderPDF):
+    """PurchaseOrderPDF that serves repeated requests from a PDFCache.
+
+    memory_tier=False keeps this generator's PDFs out of the cache's memory
+    tier, for callers such as batch workers whose orders are rarely repeated;
+    with no disk tier either, a miss is then rendered straight to the output
+    and nothing is kept.
+    """
+
+    def __init__(self, cache=None, logo_path=LOGO_PATH, high_volume=None, profile_hook=None,
+                 template_mode=False, progress_hook=None, embed_data=False, memory_tier=True):
+        super().__init__(logo_path=logo_path, high_volume=high_volume, profile_hook=profile_hook,
+                         template_mode=template_mode, progress_hook=progress_hook, embed_data=embed_data)
+        self.cache = cache if cache is not None else get_default_cache()
+        self.memory_tier = memory_tier
+        self.last_cache_hit = False
+
+    def template_token(self):
+        """Identify the template resources and layout, so a logo swap invalidates cached PDFs"""
+        try:
+            mtime = os.stat(self.logo_path).st_mtime_ns
+        except OSError:
+            mtime = 0
+        return f"{self.logo_path}:{mtime}:{self.high_volume}:{self.embed_data}"
+
+    def generate_pdf(self, po_data, output=None, data_output=None):
+        """Return the cached PDF for po_data, rendering and storing it on a miss.
+
+        output and data_output work as in PurchaseOrderPDF.generate_pdf.
+        A miss is rendered directly into output; the PDF is only read back
+        for the cache tiers in use, and a file path is copied into the disk
+        tier without reading it. The profile_hook only fires for renders,
+        not for cache hits.
+        """
+        key = cache_key(po_data, self.template_token())
+        data = self.cache.get(key, remember=self.memory_tier)
+        self.last_cache_hit = data is not None
+        if data is not None:
+            if data_output is not None:
+                from sidecar import write_json
+
+                write_json(po_data, data_output)
+            return write_output(data, output)
+
+        result = super().generate_pdf(po_data, output, data_output)
+        if isinstance(result, (str, os.PathLike)):
+            if self.memory_tier:
+                with open(result, 'rb') as f:
+                    self.cache.put(key, f.read())
+            else:
+                self.cache.put_file(key, result)
+        elif self.memory_tier or self.cache.cache_dir:
+            data = _read_back(result)
+            if data is not None:
+                self.cache.put(key, data, remember=self.memory_tier)
+        return result
@@ -1,149 +1,171 @@
 import io
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.platypus.flowables import HRFlowable
-from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
-from reportlab.graphics import renderPDF
-from reportlab.graphics.shapes import Drawing, Rect
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
 import os
 
-# Try to import SVG support
-try:
-    from svglib.svglib import svg2rlg
-    SVG_AVAILABLE = True
-except ImportError:
-    SVG_AVAILABLE = False
+# ReportLab and svglib are imported inside the functions that need them, so
+# importing this module stays cheap until the first render (or prewarm()).
 
-class PurchaseOrderPDF:
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self.setup_custom_styles()
-    
-    def setup_custom_styles(self):
-        """Setup custom paragraph styles"""
-        # Company name style
-        self.styles.add(ParagraphStyle(
-            name='CompanyName',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            textColor=colors.black,
-            spaceAfter=0,
-            alignment=TA_LEFT
-        ))
-        
-        # Tagline style
-        self.styles.add(ParagraphStyle(
-            name='Tagline',
-            parent=self.styles['Normal'],
-            fontSize=12,
-            textColor=colors.grey,
-            spaceAfter=20,
-            alignment=TA_LEFT
-        ))
-        
-        # Purchase Order title style - aligned to start at same level as logo
-        self.styles.add(ParagraphStyle(
-            name='POTitle',
-            parent=self.styles['Heading1'],
-            fontSize=20,
-            textColor=colors.black,
-            spaceAfter=15,  # Add proper space after title
-            spaceBefore=0,
-            leading=20,  # Set line height to match font size for precise alignment
-            alignment=TA_RIGHT,
-            fontName='Helvetica-Bold'
-        ))
-        
-        # Section header style
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=self.styles['Heading2'],
-            fontSize=12,
-            textColor=colors.black,
-            spaceAfter=8,
-            fontName='Helvetica-Bold'
-        ))
-        
-        # Address style
-        self.styles.add(ParagraphStyle(
-            name='Address',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            textColor=colors.black,
-            spaceAfter=4,
-            alignment=TA_LEFT
-        ))
-        
-        # Right aligned style with better spacing
-        self.styles.add(ParagraphStyle(
-            name='RightAlign',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            alignment=TA_RIGHT,
-            spaceAfter=3,
-            spaceBefore=0,
-            leading=14  # Better line spacing
-        ))
-        
-        # Style for item descriptions with word wrapping
-        self.styles.add(ParagraphStyle(
-            name='ItemDescription',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            alignment=TA_LEFT,
-            spaceAfter=0,
-            spaceBefore=0,
-            wordWrap='CJK'
-        ))
-    
-    def create_logo(self):
-        """Load and create the Kovan Labs logo from SVG"""
+LOGO_PATH = 'kovan.svg'
+
+# PDFs written to spooled_output() move from memory to disk above this size
+SPOOL_MAX_BYTES = 2 * 1024 * 1024
+
+# Orders with at least this many items use the high-volume items layout
+HIGH_VOLUME_ITEMS = 500
+
+# Items table geometry, shared by the normal and high-volume layouts
+ITEM_COLUMN_WIDTHS_INCH = [4, 0.8, 1.1, 1.1]
+ITEM_CELL_PADDING = 8
+ITEM_FONT_SIZE = 10
+ITEM_HEADER_HEIGHT = 11 * 1.2 + 12 + 12  # Header font leading plus padding
+ITEM_LINE_HEIGHT = ITEM_FONT_SIZE * 1.2 + 2 * ITEM_CELL_PADDING
+
+# Styles, table styles and the parsed logo are built once per process and
+# shared by every PurchaseOrderPDF instance. None of them is mutated after
+# construction, so they are safe to use from several threads at once.
+TemplateContext = namedtuple('TemplateContext', ['styles', 'table_styles'])
+
+_context_lock = threading.Lock()
+_template_context = None
+
+_logo_lock = threading.Lock()
+_logo_cache = {}  # path -> (mtime_ns, Drawing)
+
+_svg_available = None
+
+
+def svg_available():
+    """Whether svglib can be imported, checked once on first use"""
+    global _svg_available
+    if _svg_available is None:
         try:
-            # Check if SVG file exists
-            if os.path.exists('kovan.svg') and SVG_AVAILABLE:
-                # Use the correct svglib function to convert SVG to ReportLab drawing
-                logo = svg2rlg('kovan.svg')
-                # Scale the logo to appropriate size for header
-                logo.width = 70
-                logo.height = 55
-                logo.scale(0.35, 0.35)
-                return logo
-            else:
-                # SVG file doesn't exist or svglib not available, use text fallback
-                return Paragraph("<b>KOVAN LABS</b>", self.styles['CompanyName'])
-                
-        except Exception as e:
-            print(f"Error loading SVG logo: {e}")
-            # Any other error, use text fallback
-            return Paragraph("<b>KOVAN LABS</b>", self.styles['CompanyName'])
+            import svglib.svglib  # noqa: F401
+            _svg_available = True
+        except ImportError:
+            _svg_available = False
+    return _svg_available
 
-    
-    def generate_pdf(self, po_data):
-        """Generate the complete purchase order PDF"""
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, 
-                              rightMargin=0.75*inch, leftMargin=0.5*inch,  # Reduced left margin for better left alignment
-                              topMargin=0.75*inch, bottomMargin=0.75*inch)
-        
-        story = []
-        
-        # Header with logo and purchase order title - perfect alignment and spacing
-        header_data = [
-            [self.create_logo(), 
-             '',
-             [Paragraph("PURCHASE ORDER", self.styles['POTitle']),
-              Paragraph(f"PO Number: {po_data['po_number']}", self.styles['RightAlign']),
-              Paragraph(f"Order Date: {po_data['order_date']}", self.styles['RightAlign']),
-              Paragraph(f"Purchase Date: {po_data['due_date']}", self.styles['RightAlign'])]]
-        ]
-        
-        header_table = Table(header_data, colWidths=[1.8*inch, 2.2*inch, 2.5*inch])
-        header_table.setStyle(TableStyle([
+
+def build_stylesheet():
+    """Build the sample stylesheet extended with the purchase order styles"""
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_LEFT, TA_RIGHT
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+    styles = getSampleStyleSheet()
+
+    # Company name style
+    styles.add(ParagraphStyle(
+        name='CompanyName',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.black,
+        spaceAfter=0,
+        alignment=TA_LEFT
+    ))
+
+    # Tagline style
+    styles.add(ParagraphStyle(
+        name='Tagline',
+        parent=styles['Normal'],
+        fontSize=12,
+        textColor=colors.grey,
+        spaceAfter=20,
+        alignment=TA_LEFT
+    ))
+
+    # Purchase Order title style - aligned to start at same level as logo
+    styles.add(ParagraphStyle(
+        name='POTitle',
+        parent=styles['Heading1'],
+        fontSize=20,
+        textColor=colors.black,
+        spaceAfter=15,  # Add proper space after title
+        spaceBefore=0,
+        leading=20,  # Set line height to match font size for precise alignment
+        alignment=TA_RIGHT,
+        fontName='Helvetica-Bold'
+    ))
+
+    # Section header style
+    styles.add(ParagraphStyle(
+        name='SectionHeader',
+        parent=styles['Heading2'],
+        fontSize=12,
+        textColor=colors.black,
+        spaceAfter=8,
+        fontName='Helvetica-Bold'
+    ))
+
+    # Address style
+    styles.add(ParagraphStyle(
+        name='Address',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=colors.black,
+        spaceAfter=4,
+        alignment=TA_LEFT
+    ))
+
+    # Right aligned style with better spacing
+    styles.add(ParagraphStyle(
+        name='RightAlign',
+        parent=styles['Normal'],
+        fontSize=11,
+        alignment=TA_RIGHT,
+        spaceAfter=3,
+        spaceBefore=0,
+        leading=14  # Better line spacing
+    ))
+
+    # Style for item descriptions with word wrapping
+    styles.add(ParagraphStyle(
+        name='ItemDescription',
+        parent=styles['Normal'],
+        fontSize=10,
+        alignment=TA_LEFT,
+        spaceAfter=0,
+        spaceBefore=0,
+        wordWrap='CJK'
+    ))
+
+    return styles
+
+
+def build_table_styles():
+    """Build the table styles used by every purchase order"""
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    items_commands = [
+        # Header row - Light gray background instead of black
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('TOPPADDING', (0, 0), (-1, 0), 12),
+
+        # Data rows
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),  # Center align quantity, price, total
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),    # Align content to top for better text wrapping
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.whitesmoke]),  # Alternating row colors
+        ('LEFTPADDING', (0, 1), (0, -1), 8),   # Add padding for item descriptions
+        ('RIGHTPADDING', (0, 1), (0, -1), 8),
+        ('TOPPADDING', (0, 1), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+    ]
+
+    return MappingProxyType({
+        'header': TableStyle([
             ('VALIGN', (0, 0), (0, 0), 'TOP'),    # Logo aligned to top
             ('VALIGN', (2, 0), (2, 0), 'TOP'),    # Purchase order section aligned to top
             ('ALIGN', (0, 0), (0, 0), 'LEFT'),    # Logo left aligned
@@ -152,39 +174,14 @@ class PurchaseOrderPDF:
             ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
             ('LEFTPADDING', (0, 0), (0, 0), 0),   # No left padding for logo - flush left
             ('RIGHTPADDING', (2, 0), (2, 0), 0),  # No right padding for PO section
-        ]))
-        
-        story.append(header_table)
-        story.append(Spacer(1, 20))
-        
-        # Company details - properly aligned with logo
-        company_info = f"{po_data['company_name']}<br/>{po_data['company_address']}<br/>{po_data['company_phone']}"
-        company_para = Paragraph(company_info, self.styles['Address'])
-        
-        # Create table for company info to ensure left alignment
-        company_table = Table([[company_para]], colWidths=[6.5*inch])
-        company_table.setStyle(TableStyle([
+        ]),
+        'company': TableStyle([
             ('ALIGN', (0, 0), (0, 0), 'LEFT'),
             ('LEFTPADDING', (0, 0), (0, 0), 0),
             ('TOPPADDING', (0, 0), (0, 0), 0),
             ('BOTTOMPADDING', (0, 0), (0, 0), 0),
-        ]))
-        
-        story.append(company_table)
-        story.append(Spacer(1, 25))
-        
-        # Bill To and Ship To section - perfectly aligned
-        bill_ship_data = [
-            [Paragraph("Bill To:", self.styles['SectionHeader']),
-             Paragraph("Ship To:", self.styles['SectionHeader'])],
-            [Paragraph(f"{po_data['bill_to_name']}<br/>{po_data['bill_to_address']}<br/>{po_data['bill_to_phone']}", 
-                      self.styles['Address']),
-             Paragraph(f"{po_data['ship_to_name']}<br/>{po_data['ship_to_address']}<br/>{po_data['ship_to_phone']}", 
-                      self.styles['Address'])]
-        ]
-        
-        bill_ship_table = Table(bill_ship_data, colWidths=[3.25*inch, 3.25*inch])
-        bill_ship_table.setStyle(TableStyle([
+        ]),
+        'bill_ship': TableStyle([
             ('VALIGN', (0, 0), (-1, -1), 'TOP'),
             ('ALIGN', (0, 0), (0, 0), 'LEFT'),   # Bill To aligned left
             ('ALIGN', (1, 0), (1, 0), 'LEFT'),   # Ship To aligned left
@@ -193,15 +190,278 @@ class PurchaseOrderPDF:
             ('RIGHTPADDING', (0, 0), (-1, -1), 0),
             ('TOPPADDING', (0, 0), (-1, -1), 0),
             ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-        ]))
-        
-        story.append(bill_ship_table)
-        story.append(Spacer(1, 25))
-        
+        ]),
+        'items': TableStyle(items_commands),
+        # One page of a high-volume items table, ending in a page subtotal row
+        'items_page': TableStyle(items_commands + [
+            ('SPAN', (0, -1), (2, -1)),
+            ('ALIGN', (0, -1), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+        ]),
+        'totals': TableStyle([
+            ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
+            ('ALIGN', (3, 0), (3, -1), 'RIGHT'),
+            ('FONTNAME', (2, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (2, 0), (-1, -1), 11),
+            ('LINEABOVE', (2, -1), (-1, -1), 2, colors.black),  # Rule above the final total
+            ('TOPPADDING', (2, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (2, 0), (-1, -1), 8),
+        ]),
+    })
+
+
+def get_template_context():
+    """Return the process-wide template context, building it on first use"""
+    global _template_context
+    if _template_context is None:
+        with _context_lock:
+            if _template_context is None:
+                _template_context = TemplateContext(
+                    styles=build_stylesheet(),
+                    table_styles=build_table_styles()
+                )
+    return _template_context
+
+
+def load_logo(path=LOGO_PATH):
+    """Return the parsed logo drawing for path, re-parsing only when the file changes"""
+    mtime = os.stat(path).st_mtime_ns
+    with _logo_lock:
+        cached = _logo_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+    from svglib.svglib import svg2rlg
+
+    # Parse outside the lock; a concurrent parse of the same file is harmless
+    logo = svg2rlg(path)
+    if logo is None:
+        raise ValueError(f"Could not parse SVG logo: {path}")
+    # Scale the logo to appropriate size for header
+    logo.width = 70
+    logo.height = 55
+    logo.scale(0.35, 0.35)
+
+    with _logo_lock:
+        _logo_cache[path] = (mtime, logo)
+    return logo
+
+
+def spooled_output(max_size=SPOOL_MAX_BYTES):
+    """Temporary binary file that stays in memory until it grows past max_size"""
+    return tempfile.SpooledTemporaryFile(max_size=max_size, mode='w+b')
+
+
+def write_output(data, output=None):
+    """Write finished PDF bytes to an output accepted by generate_pdf and return it the same way"""
+    if output is None:
+        return io.BytesIO(data)
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, 'wb') as f:
+            f.write(data)
+        return output
+    start = output.tell() if output.seekable() else None
+    output.write(data)
+    if start is not None:
+        output.seek(start)
+    return output
+
+
+def prewarm(logo_path=LOGO_PATH):
+    """Import the rendering modules and build the shared template context.
+
+    Optional: call at server or worker start so the first request does not
+    pay for the imports, the stylesheet and the logo parse.
+    """
+    import reportlab.platypus  # noqa: F401
+    get_template_context()
+    if svg_available() and os.path.exists(logo_path):
+        try:
+            load_logo(logo_path)
+        except Exception as e:
+            print(f"Error loading SVG logo: {e}")
+
+
+class RenderProfile:
+    """Stage timings and output figures for one render.
+
+    Stages, in order: styles (template context and page template),
+    normalize (validation and escaping of po_data), logo, header, company,
+    bill_ship, items, totals (totals, notes and terms) and build
+    (doc.build). In template mode logo and company are part of header,
+    and a letterhead captured for the first time is drawn during build.
+    mark() closes the current stage.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.items = 0
+        self.pages = 0
+        self.bytes = 0
+        self.high_volume = False
+        self._started = self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    @property
+    def seconds(self):
+        return self._last - self._started
+
+    def to_dict(self):
+        return {
+            'stages': dict(self.stages),
+            'seconds': self.seconds,
+            'items': self.items,
+            'pages': self.pages,
+            'bytes': self.bytes,
+            'high_volume': self.high_volume,
+        }
+
+
+class PurchaseOrderPDF:
+    def __init__(self, logo_path=LOGO_PATH, high_volume=None, profile_hook=None, template_mode=False,
+                 progress_hook=None, embed_data=False):
+        self.logo_path = logo_path
+        # None picks the high-volume layout automatically from the item count
+        self.high_volume = high_volume
+        # Draw the logo, title and company details from a cached letterhead form
+        self.template_mode = template_mode
+        # Called with the fraction of the story laid out (0 to 1) during doc.build
+        self.progress_hook = progress_hook
+        # Called with a RenderProfile after each render; None skips all timing
+        self.profile_hook = profile_hook
+        # Attach the normalized po_data to each PDF as po_data.json (see sidecar.py)
+        self.embed_data = embed_data
+
+    @property
+    def styles(self):
+        return get_template_context().styles
+
+    @property
+    def table_styles(self):
+        return get_template_context().table_styles
+
+    def create_logo(self):
+        """Load and create the Kovan Labs logo from SVG"""
+        from reportlab.platypus import Paragraph
+
+        try:
+            # Check if SVG file exists
+            if os.path.exists(self.logo_path) and svg_available():
+                # Hand out a copy so drawing never touches the cached template
+                return load_logo(self.logo_path).copy()
+            else:
+                # SVG file doesn't exist or svglib not available, use text fallback
+                return Paragraph("<b>KOVAN LABS</b>", self.styles['CompanyName'])
+
+        except Exception as e:
+            print(f"Error loading SVG logo: {e}")
+            # Any other error, use text fallback
+            return Paragraph("<b>KOVAN LABS</b>", self.styles['CompanyName'])
+
+
+    def make_doc(self, output):
+        """Create the page template that purchase orders are laid out on"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate
+
+        return SimpleDocTemplate(output, pagesize=A4,
+                                 rightMargin=0.75*inch, leftMargin=0.5*inch,  # Reduced left margin for better left alignment
+                                 topMargin=0.75*inch, bottomMargin=0.75*inch)
+
+    def uses_high_volume(self, po_data):
+        """Whether po_data is laid out with the high-volume items layout"""
+        if self.high_volume is None:
+            return len(po_data['items']) >= HIGH_VOLUME_ITEMS
+        return self.high_volume
+
+    def build_high_volume_items(self, items, used_height):
+        """Lay out items as one table per page, each with a repeated header and page subtotal.
+
+        Rows are measured once up front (a fixed height for single-line
+        descriptions, a Paragraph wrap otherwise) and packed greedily into
+        pages, so ReportLab never has to measure or split one huge table. Descriptions
+        that fit on one line and contain no markup are plain strings rather
+        than Paragraphs. used_height is the space already taken on the first
+        page by the flowables above the items.
+        """
+        from reportlab.lib.units import inch
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        from reportlab.platypus import PageBreak, Paragraph, Table
+
+        doc = self.make_doc(None)
+        # Frames pad each side by 6pt; keep a little slack against rounding
+        page_height = doc.height - 12 - 2
+        col_widths = [width * inch for width in ITEM_COLUMN_WIDTHS_INCH]
+        text_width = col_widths[0] - 2 * ITEM_CELL_PADDING
+        description_style = self.styles['ItemDescription']
+        table_style = self.table_styles['items_page']
+        header = ['Item', 'Quantity', 'Unit Price', 'Total']
+        fixed_height = ITEM_HEADER_HEIGHT + ITEM_LINE_HEIGHT  # Header plus subtotal row
+
+        flowables = []
+        rows = []
+        row_heights = []
+        page_total = 0
+
+        def flush():
+            data = [header] + rows + [['Page subtotal:', '', '', f"Rs.{page_total:,.2f}"]]
+            # Rows are already measured, so the table does not wrap them again
+            heights = [ITEM_HEADER_HEIGHT] + row_heights + [ITEM_LINE_HEIGHT]
+            table = Table(data, colWidths=col_widths, rowHeights=heights, repeatRows=1)
+            table.setStyle(table_style)
+            if flowables:
+                flowables.append(PageBreak())
+            flowables.append(table)
+
+        available = page_height - used_height
+        rows_height = fixed_height
+        for item in items:
+            description = item['item']
+            if (stringWidth(description, 'Helvetica', ITEM_FONT_SIZE) <= text_width
+                    and not any(ch in description for ch in '<>&\n')):
+                cell = description
+                row_height = ITEM_LINE_HEIGHT
+            else:
+                cell = Paragraph(description, description_style)
+                row_height = cell.wrap(text_width, page_height)[1] + 2 * ITEM_CELL_PADDING
+
+            if rows_height + row_height > available and (rows or available < page_height):
+                if rows:
+                    flush()
+                elif not flowables:
+                    # Not even one row fits below the header block on page one
+                    flowables.append(PageBreak())
+                rows = []
+                row_heights = []
+                page_total = 0
+                available = page_height
+                rows_height = fixed_height
+
+            rows.append([cell, str(item['quantity']),
+                         f"Rs.{item['unit_price']:,.2f}", f"Rs.{item['total']:,.2f}"])
+            row_heights.append(row_height)
+            rows_height += row_height
+            page_total += item['total']
+
+        if rows:
+            flush()
+        return flowables
+
+    def build_items_table(self, items):
+        """Build the items table with one wrapped Paragraph per description"""
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, Table
+
         # Items table with proper text wrapping
         items_data = [['Item', 'Quantity', 'Unit Price', 'Total']]
-        
-        for item in po_data['items']:
+
+        for item in items:
             # Create paragraph for item description to enable word wrapping
             item_para = Paragraph(item['item'], self.styles['ItemDescription'])
             items_data.append([
@@ -210,66 +470,201 @@ class PurchaseOrderPDF:
                 f"Rs.{item['unit_price']:,.2f}",
                 f"Rs.{item['total']:,.2f}"
             ])
-        
+
         # Adjust column widths to give more space for item descriptions
-        items_table = Table(items_data, colWidths=[4*inch, 0.8*inch, 1.1*inch, 1.1*inch])
-        items_table.setStyle(TableStyle([
-            # Header row - Light gray background instead of black
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('TOPPADDING', (0, 0), (-1, 0), 12),
-            
-            # Data rows
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ALIGN', (1, 1), (-1, -1), 'CENTER'),  # Center align quantity, price, total
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),    # Align content to top for better text wrapping
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.whitesmoke]),  # Alternating row colors
-            ('LEFTPADDING', (0, 1), (0, -1), 8),   # Add padding for item descriptions
-            ('RIGHTPADDING', (0, 1), (0, -1), 8),
-            ('TOPPADDING', (0, 1), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-        ]))
-        
-        story.append(items_table)
+        items_table = Table(items_data, colWidths=[width * inch for width in ITEM_COLUMN_WIDTHS_INCH])
+        items_table.setStyle(self.table_styles['items'])
+        return items_table
+
+    def header_slot_paragraphs(self, po_data):
+        """The variable lines under the title: PO number, order date and due date"""
+        from reportlab.platypus import Paragraph
+
+        return [Paragraph(f"PO Number: {po_data['po_number']}", self.styles['RightAlign']),
+                Paragraph(f"Order Date: {po_data['order_date']}", self.styles['RightAlign']),
+                Paragraph(f"Purchase Date: {po_data['due_date']}", self.styles['RightAlign'])]
+
+    def build_header_table(self, logo, header_lines):
+        """Header with logo and purchase order title - perfect alignment and spacing"""
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, Table
+
+        header_data = [
+            [logo,
+             '',
+             [Paragraph("PURCHASE ORDER", self.styles['POTitle'])] + list(header_lines)]
+        ]
+
+        header_table = Table(header_data, colWidths=[1.8*inch, 2.2*inch, 2.5*inch])
+        header_table.setStyle(self.table_styles['header'])
+        return header_table
+
+    def build_company_table(self, po_data):
+        """Company details - properly aligned with logo"""
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, Table
+
+        company_info = f"{po_data['company_name']}<br/>{po_data['company_address']}<br/>{po_data['company_phone']}"
+        company_para = Paragraph(company_info, self.styles['Address'])
+
+        # Create table for company info to ensure left alignment
+        company_table = Table([[company_para]], colWidths=[6.5*inch])
+        company_table.setStyle(self.table_styles['company'])
+        return company_table
+
+    def build_story(self, po_data, profile=None):
+        """Build the list of flowables for a purchase order, marking stages on profile if given.
+
+        po_data is validated and its text escaped first (see normalize.py);
+        raises PODataError if it cannot be laid out.
+        """
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Table, Paragraph, Spacer
+        from normalize import format_percent, normalize_po_data
+
+        po_data = normalize_po_data(po_data)
+        if profile is not None:
+            profile.mark('normalize')
+
+        story = []
+
+        if self.template_mode:
+            # Logo, title and company details come from the cached letterhead form
+            from letterhead import Letterhead
+
+            story.append(Letterhead(self, po_data))
+            story.append(Spacer(1, 25))
+            if profile is not None:
+                profile.mark('header')
+        else:
+            logo = self.create_logo()
+            if profile is not None:
+                profile.mark('logo')
+
+            story.append(self.build_header_table(logo, self.header_slot_paragraphs(po_data)))
+            story.append(Spacer(1, 20))
+            if profile is not None:
+                profile.mark('header')
+
+            story.append(self.build_company_table(po_data))
+            story.append(Spacer(1, 25))
+            if profile is not None:
+                profile.mark('company')
+
+        # Bill To and Ship To section - perfectly aligned
+        bill_ship_data = [
+            [Paragraph("Bill To:", self.styles['SectionHeader']),
+             Paragraph("Ship To:", self.styles['SectionHeader'])],
+            [Paragraph(f"{po_data['bill_to_name']}<br/>{po_data['bill_to_address']}<br/>{po_data['bill_to_phone']}",
+                      self.styles['Address']),
+             Paragraph(f"{po_data['ship_to_name']}<br/>{po_data['ship_to_address']}<br/>{po_data['ship_to_phone']}",
+                      self.styles['Address'])]
+        ]
+
+        bill_ship_table = Table(bill_ship_data, colWidths=[3.25*inch, 3.25*inch])
+        bill_ship_table.setStyle(self.table_styles['bill_ship'])
+
+        story.append(bill_ship_table)
+        story.append(Spacer(1, 25))
+        if profile is not None:
+            profile.mark('bill_ship')
+
+        # Items table - very long orders are split into one table per page
+        if self.uses_high_volume(po_data):
+            frame_width = self.make_doc(None).width - 12
+            used_height = sum(flowable.wrap(frame_width, 10**6)[1] for flowable in story)
+            story.extend(self.build_high_volume_items(po_data['items'], used_height))
+        else:
+            story.append(self.build_items_table(po_data['items']))
         story.append(Spacer(1, 15))
-        
+        if profile is not None:
+            profile.mark('items')
+
         # Totals section - properly aligned with adjusted column widths
-        totals_data = [
-            ['', '', 'Subtotal:', f"Rs.{po_data['subtotal']:,.2f}"],
-            ['', '', 'Total:', f"Rs.{po_data['total']:,.2f}"]
-        ]
-        
+        totals_data = [['', '', 'Subtotal:', f"Rs.{po_data['subtotal']:,.2f}"]]
+        if po_data.get('discount'):
+            totals_data.append(['', '', 'Discount:', f"-Rs.{po_data['discount']:,.2f}"])
+        if po_data.get('tax'):
+            tax_label = f"Tax ({format_percent(po_data['tax_rate'])}%):" if po_data.get('tax_rate') else 'Tax:'
+            totals_data.append(['', '', tax_label, f"Rs.{po_data['tax']:,.2f}"])
+        totals_data.append(['', '', 'Total:', f"Rs.{po_data['total']:,.2f}"])
+
         totals_table = Table(totals_data, colWidths=[4*inch, 0.8*inch, 1.1*inch, 1.1*inch])
-        totals_table.setStyle(TableStyle([
-            ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
-            ('ALIGN', (3, 0), (3, -1), 'RIGHT'),
-            ('FONTNAME', (2, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (2, 0), (-1, -1), 11),
-            ('LINEABOVE', (2, 1), (-1, 1), 2, colors.black),
-            ('TOPPADDING', (2, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (2, 0), (-1, -1), 8),
-        ]))
-        
+        totals_table.setStyle(self.table_styles['totals'])
+
         story.append(totals_table)
         story.append(Spacer(1, 25))
-        
+
         # Notes section with proper title
         if po_data.get('notes'):
             story.append(Paragraph("Notes:", self.styles['SectionHeader']))
             story.append(Paragraph(po_data['notes'], self.styles['Normal']))
             story.append(Spacer(1, 15))
-        
+
         # Terms and Conditions
         if po_data.get('terms'):
             story.append(Paragraph(po_data['terms'], self.styles['Normal']))
-        
+
+        if profile is not None:
+            profile.mark('totals')
+        return story
+
+    def generate_pdf(self, po_data, output=None, data_output=None):
+        """Generate the complete purchase order PDF.
+
+        output is where the PDF is written: a file path, a writable binary
+        file object (for example spooled_output()), or None for a new
+        BytesIO. File objects are returned positioned at the start of the
+        PDF; paths are returned unchanged. With a profile_hook, the hook is
+        called with the render's RenderProfile before returning.
+        data_output, a path or text file object, also receives the
+        normalized po_data as JSON (see sidecar.py).
+        """
+        sink = io.BytesIO() if output is None else output
+        if isinstance(sink, (str, os.PathLike)):
+            sink = os.fspath(sink)
+            start = None
+        else:
+            start = sink.tell() if sink.seekable() else None
+
+        profile = RenderProfile() if self.profile_hook is not None else None
+        if profile is not None:
+            get_template_context()
+
+        doc = self.make_doc(sink)
+        if profile is not None:
+            profile.mark('styles')
+        story = self.build_story(po_data, profile)
+        if self.progress_hook is not None:
+            total = len(story)
+
+            def report_progress(kind, value):
+                if kind == 'PROGRESS':
+                    self.progress_hook(min(value / total, 1.0))
+
+            doc.setProgressCallBack(report_progress)
+
         # Build PDF
-        doc.build(story)
-        buffer.seek(0)
-        return buffer 
\ No newline at end of file
+        if self.embed_data:
+            from sidecar import embed_record
+
+            doc.build(story, onFirstPage=lambda canv, doc: embed_record(canv, po_data))
+        else:
+            doc.build(story)
+        if data_output is not None:
+            from sidecar import write_json
+
+            write_json(po_data, data_output)
+        if profile is not None:
+            profile.mark('build')
+            profile.items = len(po_data['items'])
+            profile.pages = doc.page
+            profile.high_volume = self.uses_high_volume(po_data)
+            if isinstance(sink, str):
+                profile.bytes = os.path.getsize(sink)
+            elif start is not None:
+                profile.bytes = sink.tell() - start
+            self.profile_hook(profile)
+        if start is not None:
+            sink.seek(start)
+        return sink if output is None else output
@@ -0,0 +1,218 @@
+"""Concurrency-safe PO number allocation.
+
+PO numbers keep the existing format, PO + order date + a zero-padded daily
+sequence (PO20240101001). Sequences live in the same SQLite database as
+the PO store and are advanced with a single atomic UPSERT, so concurrent
+Streamlit sessions, batch runs and service workers never hand out the same
+number. Callers that need many numbers reserve a block in one round trip
+and hand them out locally with BlockAllocator. Numbers that are reserved
+but never used (the rest of a block, a form its user logged out of) are
+recorded as gaps so the sequence can be audited.
+
+A form's number is held with reserve() until it is confirmed as used or
+released. Forms that simply go away (a closed tab, an expired session)
+never release theirs, so holds older than RESERVATION_SECONDS are swept
+into the gaps as abandoned; if such a number is used after all, confirm()
+withdraws its gap.
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from po_store import DEFAULT_STORE_PATH, STORE_PATH_ENV, connect, transaction
+
+PO_PREFIX = 'PO'
+SEQUENCE_DIGITS = 3
+
+# A held number neither used nor released within this time is recorded as a gap
+RESERVATION_SECONDS = 12 * 60 * 60
+ABANDONED_REASON = 'abandoned'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS po_sequences (
+    prefix TEXT PRIMARY KEY,
+    next_value INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS po_number_gaps (
+    prefix TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    reason TEXT,
+    released_at TEXT NOT NULL,
+    PRIMARY KEY (prefix, value)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS po_number_reservations (
+    prefix TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    reserved_at REAL NOT NULL,
+    PRIMARY KEY (prefix, value)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_po_number_reservations_reserved_at ON po_number_reservations (reserved_at);
+"""
+
+# A reserved range of sequence values: start inclusive, end exclusive
+NumberBlock = namedtuple('NumberBlock', ['prefix', 'start', 'end'])
+
+_default_allocator_lock = threading.Lock()
+_default_allocator = None
+
+
+def daily_prefix(day=None):
+    """Sequence prefix for a day, e.g. PO20240101"""
+    return f"{PO_PREFIX}{(day or datetime.now()).strftime('%Y%m%d')}"
+
+
+def format_number(prefix, value):
+    return f"{prefix}{value:0{SEQUENCE_DIGITS}d}"
+
+
+def parse_number(po_number):
+    """Split a PO number into (prefix, sequence value)"""
+    prefix_length = len(PO_PREFIX) + 8
+    return po_number[:prefix_length], int(po_number[prefix_length:])
+
+
+class PONumberAllocator:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        return connect(self.path)
+
+    def reserve_block(self, count, prefix=None):
+        """Atomically reserve count consecutive sequence values for prefix (default: today)"""
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        prefix = prefix or daily_prefix()
+        (next_value,) = self._connect().execute(
+            """INSERT INTO po_sequences (prefix, next_value) VALUES (?, ?)
+               ON CONFLICT (prefix) DO UPDATE SET next_value = next_value + ?
+               RETURNING next_value""",
+            (prefix, 1 + count, count)
+        ).fetchone()
+        return NumberBlock(prefix, next_value - count, next_value)
+
+    def allocate(self, prefix=None):
+        """Return a single new PO number"""
+        block = self.reserve_block(1, prefix)
+        return format_number(block.prefix, block.start)
+
+    def reserve(self, prefix=None, now=None):
+        """Return a new PO number held for a form until it is confirmed or released"""
+        now = now or time.time()
+        self.sweep_reservations(now)
+        with transaction(self._connect()) as conn:
+            block = self.reserve_block(1, prefix)
+            conn.execute("INSERT INTO po_number_reservations (prefix, value, reserved_at) VALUES (?, ?, ?)",
+                         (block.prefix, block.start, now))
+        return format_number(block.prefix, block.start)
+
+    def confirm(self, po_number):
+        """Record that po_number was used: its hold ends and any abandoned gap for it is withdrawn"""
+        try:
+            prefix, value = parse_number(po_number)
+        except ValueError:
+            return  # Typed in another format, so never allocated here
+        with transaction(self._connect()) as conn:
+            conn.execute("DELETE FROM po_number_reservations WHERE prefix = ? AND value = ?", (prefix, value))
+            conn.execute("DELETE FROM po_number_gaps WHERE prefix = ? AND value = ? AND reason = ?",
+                         (prefix, value, ABANDONED_REASON))
+
+    def sweep_reservations(self, now=None, max_age=RESERVATION_SECONDS):
+        """Record holds older than max_age as abandoned gaps; returns how many were swept"""
+        cutoff = (now or time.time()) - max_age
+        conn = self._connect()
+        # Usually nothing is stale, and this read does not take the write lock
+        if conn.execute("SELECT 1 FROM po_number_reservations WHERE reserved_at < ? LIMIT 1",
+                        (cutoff,)).fetchone() is None:
+            return 0
+        released_at = datetime.now().isoformat(timespec='seconds')
+        with transaction(conn):
+            conn.execute(
+                """INSERT OR IGNORE INTO po_number_gaps (prefix, value, reason, released_at)
+                   SELECT prefix, value, ?, ? FROM po_number_reservations WHERE reserved_at < ?""",
+                (ABANDONED_REASON, released_at, cutoff)
+            )
+            return conn.execute("DELETE FROM po_number_reservations WHERE reserved_at < ?", (cutoff,)).rowcount
+
+    def release(self, po_number, reason=None):
+        """Record an allocated PO number that will never be used"""
+        self.release_values(*parse_number(po_number), reason=reason)
+
+    def release_values(self, prefix, values, reason=None):
+        """Record reserved sequence values for prefix that will never be used"""
+        if isinstance(values, int):
+            values = [values]
+        released_at = datetime.now().isoformat(timespec='seconds')
+        with transaction(self._connect()) as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO po_number_gaps (prefix, value, reason, released_at) VALUES (?, ?, ?, ?)",
+                ((prefix, value, reason, released_at) for value in values)
+            )
+            conn.executemany("DELETE FROM po_number_reservations WHERE prefix = ? AND value = ?",
+                             ((prefix, value) for value in values))
+
+    def gaps(self, prefix=None):
+        """Released PO numbers, optionally for one prefix, as (po_number, reason) pairs"""
+        query = "SELECT prefix, value, reason FROM po_number_gaps"
+        params = ()
+        if prefix:
+            query += " WHERE prefix = ?"
+            params = (prefix,)
+        rows = self._connect().execute(query + " ORDER BY prefix, value", params)
+        return [(format_number(p, value), reason) for p, value, reason in rows]
+
+
+class BlockAllocator:
+    """Hands out PO numbers from locally reserved blocks.
+
+    Only one database round trip is needed per block_size numbers, which
+    suits batch runs. Thread-safe. Call close() (or use as a context
+    manager) to record any unused numbers of the current block as gaps.
+    """
+
+    def __init__(self, allocator, block_size=100):
+        self.allocator = allocator
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._block = None
+        self._next = 0
+
+    def next(self):
+        with self._lock:
+            prefix = daily_prefix()
+            if self._block is None or self._block.prefix != prefix or self._next >= self._block.end:
+                self._release_unused('day ended' if self._block and self._block.prefix != prefix else None)
+                self._block = self.allocator.reserve_block(self.block_size, prefix)
+                self._next = self._block.start
+            value = self._next
+            self._next += 1
+            return format_number(prefix, value)
+
+    def _release_unused(self, reason=None):
+        """Record the rest of the current block as gaps (lock held)"""
+        if self._block is not None and self._next < self._block.end:
+            self.allocator.release_values(self._block.prefix, range(self._next, self._block.end),
+                                          reason=reason or 'unused block remainder')
+        self._block = None
+
+    def close(self):
+        with self._lock:
+            self._release_unused()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def get_default_allocator():
+    """Return the process-wide allocator backed by the PO store database"""
+    global _default_allocator
+    if _default_allocator is None:
+        with _default_allocator_lock:
+            if _default_allocator is None:
+                _default_allocator = PONumberAllocator(os.environ.get(STORE_PATH_ENV) or DEFAULT_STORE_PATH)
+    return _default_allocator
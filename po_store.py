@@ -0,0 +1,255 @@
+"""Persistent store of generated purchase orders.
+
+An embedded SQLite database keeps the header fields, line items and
+rendered PDF of every generated purchase order. PO number, bill-to company
+and order date are indexed so history search and lookups stay in the
+millisecond range with hundreds of thousands of orders; results are
+paginated by keyset (an opaque cursor) rather than OFFSET, so later pages
+are as fast as the first.
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+
+# Override the database location with PO_STORE_PATH
+STORE_PATH_ENV = 'PO_STORE_PATH'
+DEFAULT_STORE_PATH = 'po_store.db'
+
+# Header fields stored in their own columns; everything else stays in po_data JSON
+HEADER_COLUMNS = ['po_number', 'order_date', 'due_date', 'company_name',
+                  'bill_to_name', 'ship_to_name', 'subtotal', 'total']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS purchase_orders (
+    id INTEGER PRIMARY KEY,
+    po_number TEXT NOT NULL COLLATE NOCASE UNIQUE,
+    order_date TEXT,
+    due_date TEXT,
+    company_name TEXT,
+    bill_to_name TEXT COLLATE NOCASE,
+    ship_to_name TEXT,
+    subtotal TEXT,
+    total TEXT,
+    item_count INTEGER NOT NULL,
+    created_by TEXT,
+    created_at TEXT NOT NULL,
+    po_data TEXT NOT NULL,
+    pdf BLOB,
+    pdf_path TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_purchase_orders_bill_to ON purchase_orders (bill_to_name);
+CREATE INDEX IF NOT EXISTS idx_purchase_orders_order_date ON purchase_orders (order_date);
+CREATE TABLE IF NOT EXISTS po_items (
+    po_id INTEGER NOT NULL REFERENCES purchase_orders (id) ON DELETE CASCADE,
+    line_no INTEGER NOT NULL,
+    item TEXT NOT NULL,
+    quantity REAL NOT NULL,
+    unit_price REAL NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (po_id, line_no)
+) WITHOUT ROWID;
+"""
+
+# Columns returned by search(); the PDF blob and po_data JSON are left out,
+# has_pdf only says whether get_pdf() will find one
+SUMMARY_COLUMNS = ['id', 'po_number', 'order_date', 'due_date', 'bill_to_name',
+                   'total', 'item_count', 'created_by', 'created_at',
+                   '(pdf IS NOT NULL OR pdf_path IS NOT NULL) AS has_pdf']
+
+_default_store_lock = threading.Lock()
+_default_store = None
+# path -> connection, per thread; see connect()
+_connections = threading.local()
+
+
+def connect(path):
+    """This thread's connection to the database at path, opened on first use.
+
+    Streamlit runs each session's script in its own thread, so connections
+    are per thread, and one is shared by everything using the same file (the
+    PO store, the PO number allocator and the user store). Connections are
+    in autocommit mode; group statements with transaction(). Rows can be
+    read by position or column name.
+    """
+    by_path = getattr(_connections, 'by_path', None)
+    if by_path is None:
+        by_path = _connections.by_path = {}
+    key = os.path.abspath(path)
+    conn = by_path.get(key)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        by_path[key] = conn
+    return conn
+
+
+@contextmanager
+def transaction(conn):
+    """Run the statements in the block as one write transaction, rolled back on error"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+
+
+class DuplicatePOError(ValueError):
+    """Raised when saving a purchase order under a PO number that is already stored"""
+
+    def __init__(self, po_number):
+        super().__init__(f"Purchase order {po_number} already exists")
+        self.po_number = po_number
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()  # numpy scalars from DataFrame records
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _like_prefix(text):
+    """LIKE pattern matching values that start with text"""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + '%'
+
+
+class POStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        return connect(self.path)
+
+    def save(self, po_data, pdf=None, pdf_path=None, created_by=None):
+        """Insert a purchase order with its items and rendered PDF.
+
+        pdf may be bytes or any buffer (such as BytesIO.getbuffer()); pass
+        pdf_path instead to record where the PDF was written. Returns the row
+        id. A stored order is never overwritten: DuplicatePOError is raised if
+        the PO number is already taken.
+        """
+        header = {key: value for key, value in po_data.items() if key != 'items'}
+        items = po_data['items']
+        values = [str(po_data.get(column, '')) for column in HEADER_COLUMNS]
+        conn = self._connect()
+        try:
+            with transaction(conn):
+                po_id = conn.execute(
+                    f"""INSERT INTO purchase_orders ({', '.join(HEADER_COLUMNS)}, item_count,
+                            created_by, created_at, po_data, pdf, pdf_path)
+                        VALUES ({', '.join('?' * len(HEADER_COLUMNS))}, ?, ?, ?, ?, ?, ?)""",
+                    values + [len(items), created_by, datetime.now().isoformat(timespec='seconds'),
+                              json.dumps(header, default=_json_default), pdf, pdf_path]
+                ).lastrowid
+                conn.executemany(
+                    "INSERT INTO po_items (po_id, line_no, item, quantity, unit_price, total) VALUES (?, ?, ?, ?, ?, ?)",
+                    ((po_id, line_no, item['item'], float(item['quantity']), float(item['unit_price']),
+                      float(item['total']))
+                     for line_no, item in enumerate(items))
+                )
+        except sqlite3.IntegrityError:
+            if self.exists(values[0]):
+                raise DuplicatePOError(values[0]) from None
+            raise
+        return po_id
+
+    def exists(self, po_number):
+        """Whether a purchase order is stored under po_number (case-insensitive)"""
+        return self._connect().execute("SELECT 1 FROM purchase_orders WHERE po_number = ?",
+                                       (str(po_number),)).fetchone() is not None
+
+    def get(self, po_number):
+        """Return the stored po_data (with items) for po_number, or None"""
+        conn = self._connect()
+        row = conn.execute("SELECT id, po_data FROM purchase_orders WHERE po_number = ?",
+                           (po_number,)).fetchone()
+        if row is None:
+            return None
+        po_data = json.loads(row['po_data'])
+        po_data['items'] = [
+            {'item': item['item'], 'quantity': item['quantity'],
+             'unit_price': item['unit_price'], 'total': item['total']}
+            for item in conn.execute(
+                "SELECT item, quantity, unit_price, total FROM po_items WHERE po_id = ? ORDER BY line_no",
+                (row['id'],))
+        ]
+        # Whole-number quantities were stored as REAL
+        for item in po_data['items']:
+            if float(item['quantity']).is_integer():
+                item['quantity'] = int(item['quantity'])
+        return po_data
+
+    def get_pdf(self, po_number):
+        """Return the stored PDF bytes for po_number, reading pdf_path if no blob was stored"""
+        row = self._connect().execute("SELECT pdf, pdf_path FROM purchase_orders WHERE po_number = ?",
+                                      (po_number,)).fetchone()
+        if row is None:
+            return None
+        if row['pdf'] is not None:
+            return row['pdf']
+        if row['pdf_path'] and os.path.exists(row['pdf_path']):
+            with open(row['pdf_path'], 'rb') as f:
+                return f.read()
+        return None
+
+    def search(self, query='', date_from=None, date_to=None, limit=20, cursor=None):
+        """Find purchase orders, newest first.
+
+        query matches the start of the PO number or the bill-to company
+        (case-insensitive); date_from/date_to bound the order date. Returns
+        (rows, next_cursor); pass next_cursor back to fetch the following
+        page, it is None on the last page.
+        """
+        conditions = []
+        params = []
+        if query:
+            conditions.append("(po_number LIKE ? ESCAPE '\\' OR bill_to_name LIKE ? ESCAPE '\\')")
+            params += [_like_prefix(query), _like_prefix(query)]
+        if date_from:
+            conditions.append("order_date >= ?")
+            params.append(str(date_from))
+        if date_to:
+            conditions.append("order_date <= ?")
+            params.append(str(date_to))
+        if cursor is not None:
+            conditions.append("id < ?")
+            params.append(cursor)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        rows = self._connect().execute(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM purchase_orders {where} ORDER BY id DESC LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+        next_cursor = rows[limit - 1]['id'] if len(rows) > limit else None
+        return [dict(row) for row in rows[:limit]], next_cursor
+
+    def latest_id(self):
+        """Row id of the newest purchase order (0 if none); changes whenever one is saved"""
+        return self._connect().execute("SELECT MAX(id) FROM purchase_orders").fetchone()[0] or 0
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM purchase_orders").fetchone()[0]
+
+
+def get_default_store():
+    """Return the process-wide store, creating the database on first use"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = POStore(os.environ.get(STORE_PATH_ENV) or DEFAULT_STORE_PATH)
+    return _default_store
@@ -0,0 +1,121 @@
+"""Background PDF rendering for the Streamlit app.
+
+Rendering a large purchase order takes long enough to freeze the page, and
+any widget interaction would restart the script mid-render. Instead the app
+submits po_data to a process-wide RenderQueue and keeps only the job id in
+session state; reruns look the job up again and show its progress until the
+PDF is ready. Submissions are keyed by the PDF cache key, so submitting the
+same order again while it is still rendering returns the running job rather
+than starting a second render.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pdf_cache import CachedPurchaseOrderPDF, cache_key
+
+DEFAULT_WORKERS = 2
+
+# Finished jobs kept for sessions that have not picked up their PDF yet
+KEEP_FINISHED = 256
+
+_default_queue_lock = threading.Lock()
+_default_queue = None
+
+
+class RenderJob:
+    """A queued, running or finished render; status is queued, rendering, done or failed"""
+
+    def __init__(self, key, po_data):
+        self.job_id = uuid.uuid4().hex
+        self.key = key
+        self.po_data = po_data
+        self.status = 'queued'
+        self.progress = 0.0
+        self.pdf = None
+        self.error = None
+        self.submitted_at = time.monotonic()
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    @property
+    def seconds(self):
+        """Time since submission, or the total time once finished"""
+        return (self.finished_at or time.monotonic()) - self.submitted_at
+
+
+class RenderQueue:
+    def __init__(self, max_workers=DEFAULT_WORKERS, keep_finished=KEEP_FINISHED):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='po-render')
+        self.keep_finished = keep_finished
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # job_id -> RenderJob, oldest first
+        self._active = {}  # cache key -> queued or rendering RenderJob
+
+    def submit(self, po_data, on_done=None):
+        """Queue po_data for rendering and return its RenderJob.
+
+        If the same order is already queued or rendering, that job is
+        returned and nothing new is queued. on_done(job) runs on the worker
+        thread after a successful render, before the job is marked done
+        (for example to save the PDF); it must not touch Streamlit state.
+        """
+        generator = CachedPurchaseOrderPDF()
+        key = cache_key(po_data, generator.template_token())
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                return job
+            job = RenderJob(key, po_data)
+            self._jobs[job.job_id] = job
+            self._active[key] = job
+            self._prune()
+        self._executor.submit(self._run, job, generator, on_done)
+        return job
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond keep_finished (lock held)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+
+    def _run(self, job, generator, on_done):
+        job.status = 'rendering'
+
+        def report_progress(fraction):
+            job.progress = fraction
+
+        generator.progress_hook = report_progress
+        try:
+            job.pdf = generator.generate_pdf(job.po_data).getvalue()
+            if on_done is not None:
+                on_done(job)
+            job.progress = 1.0
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.monotonic()
+            with self._lock:
+                self._active.pop(job.key, None)
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def get_render_queue():
+    """Return the process-wide render queue shared by all sessions"""
+    global _default_queue
+    if _default_queue is None:
+        with _default_queue_lock:
+            if _default_queue is None:
+                _default_queue = RenderQueue()
+    return _default_queue
@@ -0,0 +1,190 @@
+"""Headless HTTP service that renders purchase order PDFs.
+
+Accepts the same po_data JSON that app.py builds from the form and returns
+the PDF. Rendering runs in a process pool so the event loop never blocks on
+ReportLab; requests beyond the concurrency limit wait in a bounded queue,
+and once that queue is full the service answers 429.
+
+Endpoints:
+    POST /purchase-orders/pdf   po_data JSON in, application/pdf out
+    GET  /health                liveness and load information
+    GET  /metrics               Prometheus metrics, including per-stage render timings
+
+Usage:
+    python service.py --port 8080 --workers 4 --max-concurrency 8 --max-queue 16
+
+For local testing, create_app() works with aiohttp's in-process test client:
+
+    from aiohttp.test_utils import TestClient, TestServer
+    executor = ThreadPoolExecutor(2, initializer=init_worker)
+    client = TestClient(TestServer(create_app(executor=executor)))
+"""
+import argparse
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from aiohttp import web
+from batch import init_worker, pdf_file_name, render_document
+from metrics import RenderMetrics
+from normalize import PODataError, normalize_po_data
+from pdf_generator import prewarm
+
+RETRY_AFTER_SECONDS = 1
+
+# Largest request body accepted; aiohttp's own default of 1 MiB is too small
+# for orders with a few thousand lines. Larger bodies are answered with 413.
+DEFAULT_MAX_BODY_BYTES = 32 * 1024 * 1024
+
+
+class RenderState:
+    """Concurrency bookkeeping shared by the request handlers"""
+
+    def __init__(self, max_concurrency, max_queue):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0  # Rendering plus waiting for a slot
+        self.rendered = 0
+        self.rejected = 0
+        self.metrics = RenderMetrics()
+
+    @property
+    def saturated(self):
+        return self.in_flight >= self.max_concurrency + self.max_queue
+
+
+def validate_po_data(po_data):
+    """Return a list of problems with a po_data payload (empty when valid)"""
+    try:
+        normalize_po_data(po_data)
+    except PODataError as e:
+        return e.problems
+    return []
+
+
+async def render_pdf(request):
+    state = request.app['state']
+    if state.saturated:
+        state.rejected += 1
+        return web.json_response({'error': "Server busy, retry later"}, status=429,
+                                 headers={'Retry-After': str(RETRY_AFTER_SECONDS)})
+
+    # Count the request before the first await so concurrent arrivals see it
+    state.in_flight += 1
+    try:
+        try:
+            po_data = await request.json()
+        except ValueError:
+            return web.json_response({'error': "Request body must be valid JSON"}, status=400)
+        # Validating a long order takes tens of milliseconds; keep it off the event loop
+        loop = asyncio.get_running_loop()
+        problems = await loop.run_in_executor(None, validate_po_data, po_data)
+        if problems:
+            return web.json_response({'error': "Invalid purchase order", 'details': problems}, status=400)
+
+        async with state.semaphore:
+            result = await loop.run_in_executor(request.app['executor'], render_document, 0, po_data)
+    except web.HTTPException:
+        raise  # Already an HTTP answer, such as 413 for an oversized body
+    except Exception as e:
+        return web.json_response({'error': f"Error generating PDF: {e}"}, status=500)
+    finally:
+        state.in_flight -= 1
+
+    state.rendered += 1
+    state.metrics.observe(result.profile, result.cached)
+    return web.Response(
+        body=result.pdf_bytes,
+        content_type='application/pdf',
+        headers={
+            'Content-Disposition': f'attachment; filename="{pdf_file_name(po_data)}"',
+            'X-Render-Time-Ms': f"{result.seconds * 1000:.1f}",
+            'X-Cache': 'HIT' if result.cached else 'MISS',
+        }
+    )
+
+
+async def health(request):
+    state = request.app['state']
+    return web.json_response({
+        'status': 'ok',
+        'in_flight': state.in_flight,
+        'max_concurrency': state.max_concurrency,
+        'max_queue': state.max_queue,
+        'rendered': state.rendered,
+        'rejected': state.rejected,
+    })
+
+
+async def metrics(request):
+    state = request.app['state']
+    text = state.metrics.render_text({
+        'in_flight': ('gauge', "Requests rendering or waiting for a slot.", state.in_flight),
+        'rejected_total': ('counter', "Requests answered 429 because the queue was full.", state.rejected),
+    })
+    return web.Response(text=text, content_type='text/plain', charset='utf-8',
+                        headers={'X-Content-Type-Options': 'nosniff'})
+
+
+def create_app(workers=None, max_concurrency=None, max_queue=None, executor=None, profile=True,
+               client_max_size=DEFAULT_MAX_BODY_BYTES):
+    """Build the aiohttp application.
+
+    executor defaults to a process pool with one warmed worker per CPU; pass
+    a ThreadPoolExecutor (initialized with batch.init_worker) to keep
+    everything in-process for tests. profile times the render stages in the
+    default executor's workers for /metrics. client_max_size is the largest
+    request body accepted, in bytes.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_concurrency = max_concurrency or workers
+    max_queue = max_concurrency * 2 if max_queue is None else max_queue
+
+    app = web.Application(client_max_size=client_max_size)
+    app.router.add_post('/purchase-orders/pdf', render_pdf)
+    app.router.add_get('/health', health)
+    app.router.add_get('/metrics', metrics)
+
+    async def executor_context(app):
+        own_executor = executor is None
+        if own_executor:
+            app['executor'] = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                                  initargs=(profile,))
+        else:
+            app['executor'] = executor
+        app['state'] = RenderState(max_concurrency, max_queue)
+        if own_executor:
+            # Start and warm the worker processes before taking traffic
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*[loop.run_in_executor(app['executor'], prewarm)
+                                   for _ in range(workers)])
+        yield
+        if own_executor:
+            app['executor'].shutdown(wait=True)
+
+    app.cleanup_ctx.append(executor_context)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Purchase order PDF rendering service")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=None, help="Render processes (default: CPU count)")
+    parser.add_argument('--max-concurrency', type=int, default=None,
+                        help="Documents rendered at once (default: workers)")
+    parser.add_argument('--max-queue', type=int, default=None,
+                        help="Requests allowed to wait for a slot before answering 429 (default: 2 x concurrency)")
+    parser.add_argument('--no-profile', action='store_true', help="Skip per-stage render timings in /metrics")
+    parser.add_argument('--max-body-mb', type=float, default=DEFAULT_MAX_BODY_BYTES / (1024 * 1024),
+                        help="Largest request body accepted, in MiB, before answering 413 (default: %(default)g)")
+    args = parser.parse_args(argv)
+
+    web.run_app(create_app(workers=args.workers, max_concurrency=args.max_concurrency,
+                           max_queue=args.max_queue, profile=not args.no_profile,
+                           client_max_size=int(args.max_body_mb * 1024 * 1024)),
+                host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
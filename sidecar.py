@@ -0,0 +1,216 @@
+"""Machine-readable purchase order data written alongside the PDFs.
+
+Downstream systems should not have to parse the PDFs to get the order
+back. po_record() normalizes po_data into plain JSON types (text fields as
+strings, amounts and quantities as numbers, dates as ISO strings), which
+can be written as a JSON sidecar next to a PDF, as JSON Lines or Parquet
+for a whole batch, or embedded in the PDF itself as a po_data.json
+attachment in the style of ZUGFeRD/Factur-X.
+
+Parquet needs the optional pyarrow package; it is imported on first use.
+"""
+import json
+import os
+from datetime import date, datetime
+from normalize import to_number
+
+# Text fields of a record, in output order; amounts and items follow
+TEXT_FIELDS = ['po_number', 'order_date', 'due_date',
+               'company_name', 'company_address', 'company_phone',
+               'bill_to_name', 'bill_to_address', 'bill_to_phone',
+               'ship_to_name', 'ship_to_address', 'ship_to_phone',
+               'notes', 'terms']
+AMOUNT_FIELDS = ['subtotal', 'discount', 'tax_rate', 'tax', 'total']
+ITEM_TEXT_FIELDS = ['item']
+ITEM_NUMBER_FIELDS = ['quantity', 'unit_price', 'total']
+
+# Name of the embedded attachment, as Factur-X names its factur-x.xml
+ATTACHMENT_NAME = 'po_data.json'
+# Its MIME type as a PDF name, with "/" written as #2F. PDFName() would escape
+# the "#" again (application#232Fjson), so the name is written as raw bytes.
+ATTACHMENT_SUBTYPE = b'/application#2Fjson'
+
+# Parquet rows buffered per row group; bounds writer memory on long batches
+PARQUET_ROW_GROUP_SIZE = 10000
+
+_parquet_available = None
+
+
+def parquet_available():
+    """Whether pyarrow can be imported, checked once on first use"""
+    global _parquet_available
+    if _parquet_available is None:
+        try:
+            import pyarrow.parquet  # noqa: F401
+            _parquet_available = True
+        except ImportError:
+            _parquet_available = False
+    return _parquet_available
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _number(value):
+    """Amounts as floats and whole numbers as ints, coerced as for layout (see normalize.py)"""
+    if value is None or value == '':
+        return None
+    value = to_number(value)
+    return value if isinstance(value, int) else float(value)
+
+
+def po_record(po_data):
+    """po_data normalized to plain JSON types, with a fixed set of fields"""
+    record = {field: _text(po_data.get(field)) for field in TEXT_FIELDS}
+    for field in AMOUNT_FIELDS:
+        record[field] = _number(po_data.get(field))
+    record['items'] = [
+        {**{field: _text(item.get(field)) for field in ITEM_TEXT_FIELDS},
+         **{field: _number(item.get(field)) for field in ITEM_NUMBER_FIELDS}}
+        for item in po_data['items']
+    ]
+    return record
+
+
+def record_json(po_data):
+    """The normalized record as compact JSON text"""
+    return json.dumps(po_record(po_data), ensure_ascii=False, separators=(',', ':'))
+
+
+def write_json(po_data, output):
+    """Write the normalized record as JSON to a path or text file object"""
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(record_json(po_data))
+    else:
+        output.write(record_json(po_data))
+    return output
+
+
+def embed_record(canv, po_data):
+    """Attach the normalized record to the document being drawn on canv as po_data.json.
+
+    Like Factur-X, the file is listed in the document's EmbeddedFiles name
+    tree and in the catalog's AF (associated files) array with the Data
+    relationship, so PDF readers show it as an attachment.
+    """
+    from reportlab.pdfbase.pdfdoc import (PDFArray, PDFDictionary, PDFName, PDFStream, PDFString,
+                                          PDFZCompress)
+
+    doc = canv._doc
+    content = record_json(po_data).encode('utf-8')
+    embedded = PDFStream(PDFDictionary({
+        'Type': PDFName('EmbeddedFile'),
+        'Subtype': ATTACHMENT_SUBTYPE,
+        'Params': PDFDictionary({'Size': len(content)}),
+    }), content=content, filters=[PDFZCompress])
+    embedded_ref = doc.Reference(embedded)
+    filespec = PDFDictionary({
+        'Type': PDFName('Filespec'),
+        'F': PDFString(ATTACHMENT_NAME),
+        'UF': PDFString(ATTACHMENT_NAME),
+        'Desc': PDFString('Purchase order data'),
+        'AFRelationship': PDFName('Data'),
+        'EF': PDFDictionary({'F': embedded_ref, 'UF': embedded_ref}),
+    })
+    filespec_ref = doc.Reference(filespec)
+
+    catalog = doc.Catalog
+    catalog.Names = PDFDictionary({
+        'EmbeddedFiles': PDFDictionary({'Names': PDFArray([PDFString(ATTACHMENT_NAME), filespec_ref])}),
+    })
+    # The catalog only writes the keys it knows about; AF is added for this document alone
+    if 'AF' not in catalog.__NoDefault__:
+        catalog.__NoDefault__ = catalog.__NoDefault__ + ['AF']
+    catalog.AF = PDFArray([filespec_ref])
+
+
+def parquet_schema():
+    import pyarrow as pa
+
+    item_type = pa.struct([(field, pa.string()) for field in ITEM_TEXT_FIELDS]
+                          + [(field, pa.float64()) for field in ITEM_NUMBER_FIELDS])
+    return pa.schema([(field, pa.string()) for field in TEXT_FIELDS]
+                     + [(field, pa.float64()) for field in AMOUNT_FIELDS]
+                     + [('items', pa.list_(item_type))])
+
+
+class JSONLinesWriter:
+    """Writes one normalized record per line"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, po_data):
+        self._file.write(record_json(po_data))
+        self._file.write('\n')
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetWriter:
+    """Writes normalized records to a Parquet file, one row per order with nested items.
+
+    Rows are buffered and written a row group at a time, so memory stays
+    flat however many orders are written.
+    """
+
+    def __init__(self, path, row_group_size=PARQUET_ROW_GROUP_SIZE):
+        import pyarrow.parquet as pq
+
+        self.path = path
+        self.row_group_size = row_group_size
+        self.count = 0
+        self._schema = parquet_schema()
+        self._writer = pq.ParquetWriter(path, self._schema, compression='zstd')
+        self._rows = []
+
+    def write(self, po_data):
+        self._rows.append(po_record(po_data))
+        self.count += 1
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+
+        if self._rows:
+            self._writer.write_table(pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_data_writer(path):
+    """JSONLinesWriter or ParquetWriter for path, chosen by its extension (.parquet or .jsonl)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if os.path.splitext(path)[1].lower() == '.parquet':
+        if not parquet_available():
+            raise ImportError("Parquet output needs pyarrow (pip install pyarrow)")
+        return ParquetWriter(path)
+    return JSONLinesWriter(path)
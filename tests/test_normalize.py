@@ -0,0 +1,43 @@
+"""Regression checks for po_data normalization.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import sys
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from normalize import normalize_po_data  # noqa: E402
+from pdf_generator import PurchaseOrderPDF  # noqa: E402
+
+
+def mixed_po_data():
+    """Two lines whose amounts come as a numeric string and as a JSON float"""
+    return {
+        'company_name': 'Kovan Labs', 'company_address': 'GF44, Tidel park', 'company_phone': '8675955999',
+        'po_number': 'PO20240101001', 'order_date': '2024-01-01', 'due_date': '2024-01-03',
+        'bill_to_name': 'Acme', 'bill_to_address': '1 Road', 'bill_to_phone': '123',
+        'ship_to_name': 'Acme', 'ship_to_address': '1 Road', 'ship_to_phone': '123',
+        'items': [
+            {'item': 'Bolt', 'quantity': '1', 'unit_price': '10.50', 'total': '10.50'},
+            {'item': 'Nut', 'quantity': 1, 'unit_price': 3.5, 'total': 3.5},
+        ],
+        'subtotal': '14.00', 'tax': 0.1, 'total': 14.1,
+    }
+
+
+def test_mixed_string_and_float_amounts_share_one_type():
+    po_data = normalize_po_data(mixed_po_data())
+    totals = [item['total'] for item in po_data['items']]
+    assert totals == [Decimal('10.50'), Decimal('3.5')]
+    assert all(isinstance(total, Decimal) for total in totals)
+    assert po_data['tax'] == Decimal('0.1')
+    assert sum(totals) == Decimal('14.00')
+
+
+def test_high_volume_layout_adds_mixed_string_and_float_totals():
+    pdf = PurchaseOrderPDF(high_volume=True).generate_pdf(mixed_po_data()).getvalue()
+    assert pdf.startswith(b'%PDF-')
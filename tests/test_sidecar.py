@@ -0,0 +1,19 @@
+"""Regression checks for the order data embedded in PDFs.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pdf_generator import PurchaseOrderPDF  # noqa: E402
+from test_normalize import mixed_po_data  # noqa: E402
+
+
+def test_embedded_attachment_has_json_mime_subtype():
+    pdf = PurchaseOrderPDF(embed_data=True).generate_pdf(mixed_po_data()).getvalue()
+    assert b'/Subtype /application#2Fjson' in pdf
+    assert b'#232F' not in pdf
@@ -0,0 +1,139 @@
+"""Vendor directory with prefix autocomplete.
+
+Vendors (name, address, phone) are imported in bulk from CSV and held in
+memory as a sorted array of lower-cased name keys, searched with bisect,
+so completing a typed prefix takes microseconds even with large
+directories. Every word of a vendor name is indexed, so "indus" finds
+"Acme Industrial Supplies". The directory is a lazily loaded process-wide
+singleton shared by all Streamlit sessions, and imports are saved back to
+its CSV file.
+"""
+import csv
+import os
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+from csv_import import read_csv_records
+
+Vendor = namedtuple('Vendor', ['name', 'address', 'phone'])
+
+# Override the directory file with PO_VENDORS_PATH
+VENDORS_PATH_ENV = 'PO_VENDORS_PATH'
+DEFAULT_VENDORS_PATH = 'vendors.csv'
+
+# Accepted spellings for each column in imported files (see csv_import.py);
+# only the name is required
+VENDOR_COLUMN_ALIASES = {
+    'name': ['name', 'vendor', 'company', 'company name', 'vendor name'],
+    'address': ['address', 'vendor address', 'company address'],
+    'phone': ['phone', 'phone number', 'telephone', 'contact'],
+}
+
+_default_directory_lock = threading.Lock()
+_default_directory = None
+
+
+class VendorImportError(ValueError):
+    """Raised when a vendor file has no name column"""
+
+
+def _key(text):
+    return ' '.join(text.casefold().split())
+
+
+def read_vendors(source):
+    """Read vendors from a CSV path or binary file object.
+
+    Returns (vendors, skipped) where skipped lists the 1-based data row
+    numbers that had no vendor name.
+    """
+    vendors = []
+    skipped = []
+    for row_number, fields in read_csv_records(source, VENDOR_COLUMN_ALIASES, VendorImportError,
+                                               optional=('address', 'phone')):
+        if not fields['name']:
+            skipped.append(row_number)
+            continue
+        vendors.append(Vendor(fields['name'], fields['address'], fields['phone']))
+    return vendors, skipped
+
+
+class VendorDirectory:
+    def __init__(self, vendors=()):
+        self._lock = threading.Lock()
+        self._vendors = {}
+        # (sorted keys, positions into names, names); replaced as a whole on import
+        self._index = ([], [], [])
+        self.add(vendors)
+
+    def __len__(self):
+        return len(self._vendors)
+
+    def add(self, vendors):
+        """Add or update vendors (matched by name, ignoring case) and rebuild the index"""
+        with self._lock:
+            merged = dict(self._vendors)
+            for vendor in vendors:
+                merged[_key(vendor.name)] = vendor
+            names = sorted(merged, key=lambda key: merged[key].name.casefold())
+            entries = []
+            for position, key in enumerate(names):
+                words = key.split(' ')
+                # The full name and each later word, so prefixes match mid-name too
+                for start in range(len(words)):
+                    entries.append((' '.join(words[start:]), position))
+            entries.sort()
+            self._vendors = merged
+            self._index = ([entry[0] for entry in entries], [entry[1] for entry in entries], names)
+
+    def get(self, name):
+        return self._vendors.get(_key(name))
+
+    def complete(self, prefix, limit=10):
+        """Up to limit vendors whose name, or a word in it, starts with prefix"""
+        prefix = _key(prefix)
+        if not prefix:
+            return []
+        keys, positions, names = self._index
+        matches = []
+        # Walk only the matching slice of the index, stopping once limit vendors are found
+        for i in range(bisect_left(keys, prefix), len(keys)):
+            if not keys[i].startswith(prefix) or len(matches) >= limit:
+                break
+            if positions[i] not in matches:
+                matches.append(positions[i])
+        return [self._vendors[names[position]] for position in sorted(matches)]
+
+    def load_csv(self, source):
+        """Import vendors from CSV; returns (imported count, skipped row numbers)"""
+        vendors, skipped = read_vendors(source)
+        self.add(vendors)
+        return len(vendors), skipped
+
+    def save_csv(self, path):
+        """Write the directory to path, replacing the file atomically"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(Vendor._fields)
+            for vendor in sorted(self._vendors.values(), key=lambda vendor: vendor.name.casefold()):
+                writer.writerow(vendor)
+        os.replace(tmp_path, path)
+
+
+def vendors_path():
+    return os.environ.get(VENDORS_PATH_ENV) or DEFAULT_VENDORS_PATH
+
+
+def get_vendor_directory():
+    """Return the process-wide directory, loading the vendors file on first use"""
+    global _default_directory
+    if _default_directory is None:
+        with _default_directory_lock:
+            if _default_directory is None:
+                directory = VendorDirectory()
+                path = vendors_path()
+                if os.path.exists(path):
+                    directory.load_csv(path)
+                _default_directory = directory
+    return _default_directory